@@ -3,14 +3,49 @@ import time
 from PIL import Image
 import re
 import sys
-from datetime import datetime
+import io
+import hashlib
+import errno
+import shutil
+from datetime import datetime, timedelta
 import logging
 import argparse
 import configparser
+import sqlite3
+import json
+import csv
+import ctypes
+import threading
+import queue
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # watchdog가 없으면 이벤트 감지 없이 주기적 스캔만 사용
+    Observer = None
+    FileSystemEventHandler = object
+try:  # 선택 JPEG 인코더(opencv, simplejpeg, turbojpeg)는 numpy 배열을 입력으로 사용
+    import numpy as np
+except ImportError:
+    np = None
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+try:
+    import simplejpeg
+except ImportError:
+    simplejpeg = None
+try:
+    import turbojpeg
+except ImportError:
+    turbojpeg = None
 
 # --- 전체 처리 기능 ---
 # 1. 설정 파일(config_v003.ini)을 로드하여 프로그램 동작에 필요한 경로, 간격, 품질 등의 설정을 읽어옵니다.
-# 2. 지정된 Base 폴더를 지속적으로 감시하며, 새로운 PNG 이미지 파일 또는 수정된 PNG 이미지 파일을 찾습니다.
+# 2. 지정된 Base 폴더의 대상 연월 말단 폴더를 지속적으로 감시하며, 새로운 PNG 이미지 파일 또는 수정된 PNG 이미지 파일을 찾습니다.
 # 3. 찾은 PNG 이미지 파일이 특정 폴더 구조 규칙 (NG, OK, NG_OK 폴더 하위의 연월 폴더, 그 하위의 LEFT, LINE 등 폴더)과 파일명 규칙을 따르는지 확인합니다.
 # 4. 이미지 파일이 완전히 쓰여져서 안정적인 상태인지 확인합니다.
 # 5. PNG 이미지를 JPG 형식으로 변환하고, 설정된 품질로 저장합니다.
@@ -33,13 +68,90 @@ import configparser
 
 # --- 설정 ---
 CONFIG_FILE = '.\src_v001\config_v003.ini'
-SCAN_INTERVAL = 1  # 폴더 스캔 간격 (초)
+SCAN_INTERVAL = 1  # 폴더 스캔 간격 (초, 적응형 스캔 간격의 최소값 기본값)
+DEFAULT_MAX_SCAN_INTERVAL_SEC = 30  # 새 파일이 없을 때 늘어나는 스캔 간격의 최대값 기본값 (초)
+DEFAULT_SCAN_BACKOFF_FACTOR = 2  # 새 파일이 없을 때 스캔 간격을 늘리는 배수 기본값
+DEFAULT_ROLLOVER_OVERLAP_SEC = 600  # 자정에 날짜가 바뀐 후 이전 날짜도 함께 스캔하는 시간 기본값 (초)
+DEFAULT_OVERLAP_SCAN_INTERVAL_SEC = 60  # 이전 날짜 스캔 간격 기본값 (초)
+DEFAULT_BACKFILL_WORKERS = 4  # 백필 모드에서 날짜를 동시에 처리하는 작업자 프로세스 수 기본값
+DEFAULT_METRICS_INTERVAL_SEC = 60  # 스캔 지표 CSV 기록 간격 기본값 (초)
+DEFAULT_STABILITY_MODE = "scan"  # 안정성 확인 방식 기본값 (scan: 스캔 간 비교, batch: 일괄 1회 대기)
+DEFAULT_STABLE_SCAN_COUNT = 2  # 안정된 것으로 판단하기 위한 연속 동일 스캔 횟수 기본값
+DEFAULT_LIST_WORKERS = 1  # 말단 폴더를 동시에 나열하는 스레드 수 기본값 (1: 순차 나열)
+DEFAULT_DIR_CACHE_MAX_AGE_SEC = 60  # 변경되지 않은 말단 폴더도 다시 나열하는 최대 간격 기본값 (초)
+PNG_IEND_TRAILER = b"\x00\x00\x00\x00IEND\xaeB`\x82"  # PNG 파일 끝의 IEND 청크 (길이 0 + 타입 + CRC, 12바이트)
 PROCESSED_FILES_PREFIX = "processed_files_"
+QUARANTINE_FILES_PREFIX = "quarantine_files_"
+SCAN_SNAPSHOT_SUFFIX = "_scan_snapshot.json"  # 스캔 스냅샷 파일 이름 접미사 (Processed_files 폴더 아래)
+DEFAULT_SNAPSHOT_INTERVAL_SEC = 300  # 스캔 스냅샷 주기적 저장 간격 기본값 (초)
+DEFAULT_RETRY_BASE_DELAY_SEC = 2  # 변환 실패 파일의 첫 재시도 대기 시간 기본값 (초, 실패할 때마다 2배)
+DEFAULT_RETRY_MAX_DELAY_SEC = 600  # 변환 실패 파일의 최대 재시도 대기 시간 기본값 (초)
+DEFAULT_RETRY_MAX_ATTEMPTS = 5  # 격리 전까지 최대 변환 시도 횟수 기본값
+CONVERT_ERROR_CONTENT = "content"  # 변환 실패 종류: PNG 내용 오류 (디코딩 실패, 잘린 파일 등 - 격리 대상 시도 횟수에 포함)
+CONVERT_ERROR_IO = "io"  # 변환 실패 종류: 입력/출력 파일 접근 오류 (공유 폴더 장애 등 - 재시도만 하고 격리하지 않음)
 PROCESSED_FILE_DELIMITER = "\t"
+JOURNAL_COMPACT_THRESHOLD = 1000  # 저널 압축 기준 (저널 줄 수 - 처리된 파일 수)
+DEFAULT_LEDGER_BACKEND = "text"  # 처리된 파일 목록 저장 방식 기본값 (text: 날짜별 텍스트 저널, sqlite: SQLite DB)
+SQLITE_LEDGER_FILENAME = "processed_files.sqlite3"  # SQLite 처리 이력 DB 파일 이름
+DEFAULT_SQLITE_LEDGER_PATH = os.path.join(".", "Ledger", SQLITE_LEDGER_FILENAME)  # SQLite 처리 이력 DB 경로 기본값 (로컬 디스크)
+SQLITE_BUSY_TIMEOUT_SEC = 30  # 다른 프로세스가 DB를 잠그고 있을 때 기다리는 최대 시간 (초)
+DEFAULT_READ_MODE = "stream"  # PNG 읽기 방식 기본값 (stream: Pillow가 파일에서 직접 읽음, slurp: 한 번에 읽은 후 메모리에서 디코딩)
+DEFAULT_PREFETCH_COUNT = 0  # 변환 중에 미리 읽어 두는 PNG 파일 수 기본값 (0: 미리 읽지 않음)
+DEFAULT_PREFETCH_MAX_MB = 256  # 미리 읽은 PNG 파일 내용의 최대 메모리 사용량 기본값 (MB)
+OUTPUT_MTIME_TOLERANCE_SEC = 0.001  # JPG 수정 시간이 원본 PNG 수정 시간과 같은지 비교할 때의 허용 오차 (초)
+DEFAULT_JPEG_ENCODER = "pillow"  # JPEG 인코더 기본값 (pillow, opencv, simplejpeg, turbojpeg)
+DEFAULT_BENCHMARK_SAMPLES = 20  # 인코더 벤치마크에 사용할 샘플 PNG 수 기본값
+DEFAULT_WRITE_BEHIND_BATCH = 32  # 스테이징 폴더의 JPG를 출력 폴더로 한 번에 옮기는 최대 파일 수 기본값
+DEFAULT_CONVERT_MODE = "serial"  # 변환 방식 기본값 (serial: 순차 변환, process: 프로세스 풀, thread: 스레드 풀 병렬 변환)
+DEFAULT_NUM_WORKERS = os.cpu_count() or 1  # 병렬 변환 작업자 수 기본값
+DEFAULT_EVENT_SOURCE = "none"  # 파일 감지 방식 기본값 (none: 주기적 스캔만, watchdog: 파일 시스템 이벤트 + 주기적 보정 스캔)
+DEFAULT_RECONCILE_INTERVAL_SEC = 60  # 이벤트 감지 사용 시 전체 보정 스캔 간격 기본값 (초)
+DRIVE_REMOTE = 4  # Windows GetDriveTypeW 반환값 중 네트워크 드라이브
+PROC_MOUNTS_FILE = "/proc/mounts"  # Linux 마운트 목록 파일 (원격 파일 시스템 확인용)
+REMOTE_FS_TYPES = {"cifs", "smb3", "smbfs", "nfs", "nfs4", "afs", "9p", "fuse.sshfs", "davfs", "fuse.davfs2"}  # 원격 파일 시스템 종류
+DEFAULT_PIPELINE_QUEUE_DEPTH = 64  # 파이프라인 단계 사이 큐의 최대 항목 수 기본값 (역압 기준)
+DEFAULT_PRIORITY_CATEGORY_ORDER = "NG, NG_OK, OK"  # 변환 우선순위 기본값 (판정 결과 폴더, 앞쪽이 먼저 변환)
+DEFAULT_PRIORITY_QUEUE_DEPTH = 1024  # 변환 단계 앞 우선순위 큐의 최대 항목 수 기본값 (이 범위 안에서 순서를 바꿈)
+TARGET_CATEGORY_FOLDERS = ['NG', 'OK', 'NG_OK']  # 처리 대상 1단계 폴더 (판정 결과)
+TARGET_CAMERA_FOLDERS = ['LEFT', 'LINE', 'LINE_TAP', 'LOAD', 'LOAD_TAP', 'RIGHT', 'TOP']  # 처리 대상 3단계 폴더 (카메라 위치)
+METRICS_FIELDNAMES = ["timestamp", "scan_interval_sec", "scans", "last_scan_duration_sec", "last_scan_found",
+                      "pending_files", "failed_files", "quarantined_files", "processed_files"] + \
+                     [f"queue_max_depth_{category}" for category in TARGET_CATEGORY_FOLDERS] + \
+                     [f"queue_avg_wait_sec_{category}" for category in TARGET_CATEGORY_FOLDERS]  # 스캔 지표 CSV 헤더
 
 # --- 전역 변수 ---
 processed_files = {}  # 처리된 파일 목록 (파일 경로: 최종 수정 시간)
+processed_files_lock = threading.Lock()  # 처리된 파일 목록과 처리 이력 기록을 보호하는 잠금 (스레드 풀 변환용)
+processed_journal_file = None  # 처리된 파일 목록 저널 파일 객체 (추가 쓰기 모드)
+processed_journal_path = None  # 현재 열려 있는 저널 파일 경로
+processed_journal_line_count = 0  # 현재 저널 파일의 줄 수 (압축 시점 판단용)
+sqlite_ledger_connection = None  # SQLite 처리 이력 DB 연결 객체
+sqlite_ledger_key = None  # 현재 로드된 SQLite 처리 이력의 (Base 폴더 이름, 날짜)
+sqlite_pending_rows = []  # 다음 트랜잭션에서 일괄 기록할 처리 이력 행 목록
+ledger_key = None  # 현재 열려 있는 처리 이력의 (Base 폴더 이름, 날짜)
+ledger_states = {}  # 다른 날짜로 바꾼 처리 이력 상태 ((Base 폴더 이름, 날짜): 처리된 파일 목록, 격리 파일 목록, 텍스트 저널)
+event_observer = None  # watchdog 파일 시스템 감시 객체 (None: 이벤트 감지 사용 안 함)
+event_paths = set()  # 마지막 스캔 이후 이벤트로 감지된 PNG 파일 경로 목록
+event_paths_lock = threading.Lock()  # 이벤트 감지 스레드와 스캔 루프가 공유하는 `event_paths` 보호 잠금
+event_signal = threading.Event()  # 새 이벤트가 감지되면 스캔 루프를 바로 깨우기 위한 신호
+convert_executor = None  # 병렬 변환 작업자 풀 (None: 순차 변환)
 GLOBAL_GRAYSCALE_MODE = None  # 이미지 모드 (True: 흑백, False: 컬러, None: 미결정)
+pending_files = {}  # 안정성 확인 대기 중인 파일 목록 (파일 경로: (크기, 최종 수정 시간, 연속 동일 스캔 횟수, 마지막 관찰 시각))
+dir_scan_cache = {}  # 말단 폴더 나열 결과 캐시 (폴더 경로: (폴더 수정 시간, {PNG 파일 경로: (크기, 최종 수정 시간)}, 나열 시각))
+dir_scan_cache_dirty = False  # 마지막 스냅샷 저장 이후 `dir_scan_cache`가 바뀌었는지 여부
+list_executor = None  # 말단 폴더 동시 나열용 스레드 풀 (None: 순차 나열)
+prefetch_executor = None  # PNG 파일 미리 읽기용 스레드 풀 (None: 미리 읽지 않음)
+write_behind_queue = queue.Queue()  # 출력 폴더로 옮길 스테이징 JPG 목록 ((스테이징 경로, 최종 경로, 변환 결과), None: 종료)
+turbojpeg_instance = None  # turbojpeg 인코더 객체 (라이브러리를 한 번만 로드하기 위함)
+available_jpeg_encoders = None  # 사용할 수 있는 JPEG 인코더 이름 목록 (None: 아직 확인 전)
+unavailable_jpeg_encoders = set()  # 설정되었지만 사용할 수 없어 이미 경고한 JPEG 인코더 이름 목록
+created_output_folders = set()  # 이미 만든 출력 폴더 목록 (폴더마다 `os.makedirs`를 반복하지 않기 위함)
+output_checked_dates = set()  # 이미 변환된 JPG 확인(skip_identical_output)을 마친 (Base 폴더 이름, 날짜) 목록
+write_behind_thread = None  # 스테이징 JPG를 출력 폴더로 옮기는 쓰기 지연 스레드 (None: 시작 전)
+priority_queue_stats = {}  # 마지막 지표 기록 이후 우선순위 큐 통계 (판정 결과 폴더: [최대 대기 수, 처리 수, 대기 시간 합계])
+scan_metrics = {}  # 최근 스캔 지표 (스캔 간격, 스캔 횟수, 소요 시간 등, METRICS_FIELDNAMES 참고)
+failed_files = {}  # 변환 실패 파일 목록 (파일 경로: (최종 수정 시간, 내용 오류 횟수, 다음 재시도 시각, 연속 실패 횟수))
+quarantined_files = {}  # 최대 시도 횟수를 넘어 격리된 파일 목록 (파일 경로: 최종 수정 시간)
 
 # --- 함수 ---
 def load_config():
@@ -91,195 +203,1688 @@ def get_processed_files_path(output_base_folder, base_folder_name, date_str):
                         f"{base_folder_name}_{PROCESSED_FILES_PREFIX}{date_str}.txt")
 
 def load_processed_files_from_file(output_base_folder, base_folder_name, target_date_str):
-    """처리된 파일 목록을 파일에서 로드하여 전역 변수에 저장합니다.
+    """처리된 파일 목록 저널을 재생하여 전역 변수에 저장합니다.
 
-    주어진 날짜에 해당하는 처리된 파일 목록 파일을 읽어
+    주어진 날짜에 해당하는 처리된 파일 목록 파일(저널)을 처음부터 읽어
     전역 변수 `processed_files` 딕셔너리에 파일 경로와 최종 수정 시간을 저장합니다.
-    파일이 존재하지 않으면 `processed_files`를 빈 딕셔너리로 초기화합니다.
+    같은 파일 경로가 여러 번 기록되어 있으면 나중에 기록된 값을 사용합니다.
+    기존의 탭 구분 형식 파일도 같은 형식이므로 그대로 읽을 수 있습니다.
+    읽은 줄 수를 반환하며, 파일이 존재하지 않으면 `processed_files`를 빈 딕셔너리로 초기화하고 0을 반환합니다.
     파일 읽기 중 오류가 발생하면 로깅합니다.
     """
     global processed_files
+    processed_files = {}
+    line_count = 0
     filepath = get_processed_files_path(output_base_folder, base_folder_name, target_date_str)
     if os.path.exists(filepath):
         try:
             with open(filepath, 'r', encoding='utf-8') as f:
                 for line in f:
+                    line_count += 1
                     parts = line.strip().split(PROCESSED_FILE_DELIMITER)
                     if len(parts) == 2:
                         file_path, timestamp = parts
                         processed_files[file_path] = float(timestamp)
         except Exception as e:
             logging.error(f"처리된 파일 목록 로드 중 오류 발생: {e}")
-    else:
-        processed_files = {} # 해당 날짜 처리 이력이 없으면 초기화
+    return line_count
 
-def save_processed_files_to_file(output_base_folder, base_folder_name, target_date_str):
-    """현재 처리된 파일 목록을 파일에 저장합니다.
+def open_processed_files_journal(output_base_folder, base_folder_name, target_date_str):
+    """처리된 파일 목록 저널을 열고 기존 기록을 재생합니다.
 
-    전역 변수 `processed_files` 딕셔너리의 내용을
-    주어진 날짜에 해당하는 처리된 파일 목록 파일에 저장합니다.
-    파일 경로는 `get_processed_files_path` 함수를 사용하여 생성합니다.
-    파일이 이미 존재하면 기존 내용을 읽어와 현재 처리된 파일 목록과 병합하고,
-    파일이 삭제된 경우 목록에서 제거합니다.
-    파일 쓰기 중 오류가 발생하면 로깅합니다.
+    이미 같은 날짜의 저널이 열려 있으면 아무 작업도 하지 않으므로, 매 스캔마다 호출해도 파일을 다시 읽지 않습니다.
+    다른 날짜의 저널이 열려 있으면 닫은 후, `load_processed_files_from_file` 함수로 새 날짜의 저널을 재생하고
+    추가 쓰기(append) 모드로 엽니다. 저널 파일 열기 중 오류가 발생하면 로깅합니다.
     """
-    global processed_files
+    global processed_journal_file, processed_journal_path, processed_journal_line_count
     filepath = get_processed_files_path(output_base_folder, base_folder_name, target_date_str)
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    if processed_journal_file is not None and processed_journal_path == filepath:
+        return
 
-    existing_data = {}
-    if os.path.exists(filepath):
+    close_processed_files_journal()
+    processed_journal_line_count = load_processed_files_from_file(output_base_folder, base_folder_name, target_date_str)
+    try:
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        processed_journal_file = open(filepath, 'a', encoding='utf-8')
+        processed_journal_path = filepath
+    except Exception as e:
+        logging.error(f"처리된 파일 목록 저널 열기 중 오류 발생: {filepath} - {e}")
+
+def append_processed_files_journal(file_path, modified_time):
+    """저널 파일 끝에 '파일 경로<TAB>최종 수정 시간' 한 줄을 추가합니다.
+
+    쓰기는 버퍼링되며, 디스크 반영은 `flush_processed_files_journal` 함수에서 스캔 주기마다 수행합니다.
+    """
+    global processed_journal_line_count
+    if processed_journal_file is None:
+        return
+    try:
+        processed_journal_file.write(f"{file_path}{PROCESSED_FILE_DELIMITER}{modified_time}\n")
+        processed_journal_line_count += 1
+    except Exception as e:
+        logging.error(f"처리된 파일 목록 저널 쓰기 중 오류 발생: {file_path} - {e}")
+
+def flush_processed_files_journal():
+    """버퍼링된 저널 기록을 파일에 반영하고, 필요하면 저널을 압축합니다.
+
+    저널의 줄 수가 처리된 파일 수보다 `JOURNAL_COMPACT_THRESHOLD` 이상 많아지면
+    (같은 파일이 여러 번 기록된 경우) `compact_processed_files_journal` 함수를 호출합니다.
+    """
+    if processed_journal_file is None:
+        return
+    try:
+        processed_journal_file.flush()
+    except Exception as e:
+        logging.error(f"처리된 파일 목록 저널 쓰기 중 오류 발생: {e}")
+    if processed_journal_line_count - len(processed_files) >= JOURNAL_COMPACT_THRESHOLD:
+        compact_processed_files_journal()
+
+def compact_processed_files_journal():
+    """저널을 현재 처리된 파일 목록만 남도록 다시 씁니다.
+
+    `processed_files`의 내용을 임시 파일(.temp)에 쓴 후 `os.replace`로 저널 파일을 교체하고,
+    교체된 저널을 다시 추가 쓰기 모드로 엽니다. 압축 중 오류가 발생하면 로깅하고 기존 저널을 계속 사용합니다.
+    """
+    global processed_journal_file, processed_journal_line_count
+    if processed_journal_file is None:
+        return
+    temp_path = f"{processed_journal_path}.temp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for file_path, timestamp in processed_files.items():
+                f.write(f"{file_path}{PROCESSED_FILE_DELIMITER}{timestamp}\n")
+        processed_journal_file.close()
+        os.replace(temp_path, processed_journal_path)
+        processed_journal_line_count = len(processed_files)
+    except Exception as e:
+        logging.error(f"처리된 파일 목록 저널 압축 중 오류 발생: {e}")
+    finally:
+        if processed_journal_file.closed:
+            processed_journal_file = open(processed_journal_path, 'a', encoding='utf-8')
+
+def close_processed_files_journal():
+    """열려 있는 저널을 반영하고 닫습니다."""
+    global processed_journal_file, processed_journal_path
+    if processed_journal_file is None:
+        return
+    try:
+        processed_journal_file.close()
+    except Exception as e:
+        logging.error(f"처리된 파일 목록 저널 닫기 중 오류 발생: {e}")
+    processed_journal_file = None
+    processed_journal_path = None
+
+def get_quarantine_files_path(output_base_folder, base_folder_name, date_str):
+    """날짜별 격리 파일 목록 파일 경로를 생성합니다.
+
+    처리된 파일 목록 파일과 같은 폴더에 'base_folder_name_quarantine_files_YYYYMMDD.txt' 이름으로 저장합니다.
+    """
+    processed_files_path = get_processed_files_path(output_base_folder, base_folder_name, date_str)
+    return os.path.join(os.path.dirname(processed_files_path),
+                        f"{base_folder_name}_{QUARANTINE_FILES_PREFIX}{date_str}.txt")
+
+def load_quarantine_files(output_base_folder, base_folder_name, target_date_str):
+    """격리 파일 목록을 파일에서 로드하여 전역 변수 `quarantined_files`에 저장합니다.
+
+    각 줄은 '파일 경로<TAB>최종 수정 시간<TAB>시도 횟수' 형식입니다.
+    재시도 대기 목록(`failed_files`)은 날짜가 바뀌어도 유지하며, 지난 날짜의 항목은 `retire_date_state` 함수에서 정리합니다.
+    파일이 존재하지 않으면 빈 목록으로 초기화하고, 파일 읽기 중 오류가 발생하면 로깅합니다.
+    """
+    global quarantined_files
+    quarantined_files = {}
+    filepath = get_quarantine_files_path(output_base_folder, base_folder_name, target_date_str)
+    if not os.path.exists(filepath):
+        return
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.strip().split(PROCESSED_FILE_DELIMITER)
+                if len(parts) >= 2:
+                    quarantined_files[parts[0]] = float(parts[1])
+    except Exception as e:
+        logging.error(f"격리 파일 목록 로드 중 오류 발생: {e}")
+
+def is_conversion_deferred(file_path, modified_time):
+    """변환 실패 이력 때문에 이번 스캔에서 변환을 건너뛰어야 하는지 확인합니다.
+
+    같은 수정 시간의 파일이 격리되어 있거나, 재시도 대기 시간이 아직 지나지 않았으면 True를 반환합니다.
+    파일이 수정되어 수정 시간이 달라지면 실패 이력과 관계없이 다시 변환을 시도합니다.
+    """
+    if quarantined_files.get(file_path) == modified_time:
+        return True
+    failure = failed_files.get(file_path)
+    return failure is not None and failure[0] == modified_time and time.time() < failure[2]
+
+def record_convert_failure(file_path, modified_time, context, error_kind=CONVERT_ERROR_CONTENT):
+    """변환 실패를 기록하고 다음 재시도 시각을 정합니다.
+
+    재시도 대기 시간은 [Retry] base_delay_sec부터 실패할 때마다 2배로 늘어나며 [Retry] max_delay_sec를 넘지 않습니다.
+    PNG 내용 오류(`CONVERT_ERROR_CONTENT`) 횟수가 [Retry] max_attempts에 도달하면 격리 목록에 추가하고,
+    처리된 파일 목록 옆의 격리 파일 목록에 한 줄을 추가합니다.
+    격리된 파일은 수정되기 전까지 다시 변환하지 않으므로, 손상된 파일 하나가 매 스캔마다 변환 비용과 오류 로그를 만들지 않습니다.
+    입력/출력 파일 접근 오류(`CONVERT_ERROR_IO`)는 재시도 대기 시간만 늘리고 격리 횟수에는 포함하지 않으므로,
+    출력 공유 폴더 장애 중에 변환하던 정상 파일이 격리되지 않고 장애가 끝난 후 변환됩니다.
+    """
+    previous = failed_files.get(file_path)
+    if previous is None or previous[0] != modified_time:
+        previous = (modified_time, 0, 0, 0)
+    attempts = previous[1] + 1 if error_kind == CONVERT_ERROR_CONTENT else previous[1]
+    failures = previous[3] + 1
+
+    if attempts < context['retry_max_attempts']:
+        delay = min(context['retry_base_delay'] * (2 ** (failures - 1)), context['retry_max_delay'])
+        failed_files[file_path] = (modified_time, attempts, time.time() + delay, failures)
+        return
+
+    failed_files.pop(file_path, None)
+    quarantined_files[file_path] = modified_time
+    logging.error(f"변환 {attempts}회 실패로 격리: {file_path}")
+    print(f"[{context['base_folder_name']}] 변환 {attempts}회 실패로 격리: {file_path}")
+    filepath = get_quarantine_files_path(context['output_base_folder'], context['base_folder_name'],
+                                         context['target_date_str'])
+    try:
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with open(filepath, 'a', encoding='utf-8') as f:
+            f.write(f"{file_path}{PROCESSED_FILE_DELIMITER}{modified_time}{PROCESSED_FILE_DELIMITER}{attempts}\n")
+    except Exception as e:
+        logging.error(f"격리 파일 목록 쓰기 중 오류 발생: {e}")
+
+def get_sqlite_ledger_path(config):
+    """SQLite 처리 이력 DB 파일 경로를 반환합니다.
+
+    설정 파일 [Ledger] sqlite_path 값을 사용하며, 비어 있으면 `DEFAULT_SQLITE_LEDGER_PATH`를 사용합니다.
+    같은 PC의 모든 Base 폴더가 하나의 DB를 공유합니다.
+    """
+    return config.get('Ledger', 'sqlite_path', fallback="") or DEFAULT_SQLITE_LEDGER_PATH
+
+def open_sqlite_ledger(db_path, base_folder_name, target_date_str):
+    """SQLite 처리 이력 DB를 열고 주어진 날짜의 처리된 파일 목록을 로드합니다.
+
+    DB는 WAL 모드로 열어 같은 PC의 여러 변환 프로세스가 같은 DB를 동시에 읽고 쓸 수 있도록 합니다.
+    WAL 모드와 파일 잠금은 네트워크 공유 폴더에서 안전하지 않으므로, DB 폴더가 `is_local_folder` 함수로
+    로컬 폴더로 확인되지 않으면 열지 않습니다 ([Ledger] sqlite_path를 로컬 디스크로 지정해야 함).
+    테이블은 (Base 폴더 이름, 날짜, 파일 경로)를 기본 키로 하며, 최종 수정 시간, 출력 경로, 파일 크기, 변환 소요 시간,
+    PNG 내용 해시(SHA-1, [Processing] read_mode가 slurp일 때만)를 저장합니다.
+    이미 같은 Base 폴더와 날짜가 로드되어 있으면 아무 작업도 하지 않습니다.
+    로드에 성공하면 True를 반환합니다. DB 열기 또는 조회 중 오류가 발생하면 로깅하고,
+    이전 날짜의 기록이 새 날짜로 섞이지 않도록 DB 연결을 닫고 로드된 처리 이력을 비운 후 False를 반환합니다
+    (다음 스캔에서 다시 연결).
+    """
+    global processed_files, sqlite_ledger_connection, sqlite_ledger_key
+    if sqlite_ledger_connection is not None and sqlite_ledger_key == (base_folder_name, target_date_str):
+        return True
+
+    if sqlite_ledger_connection is None and not is_local_folder(os.path.dirname(os.path.abspath(db_path))):
+        logging.error(f"SQLite 처리 이력 DB가 네트워크 폴더에 있어 열지 않음 ([Ledger] sqlite_path를 로컬 디스크로 지정): {db_path}")
+        processed_files = {}
+        return False
+
+    try:
+        if sqlite_ledger_connection is None:
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            sqlite_ledger_connection = sqlite3.connect(db_path, timeout=SQLITE_BUSY_TIMEOUT_SEC)
+            sqlite_ledger_connection.execute("PRAGMA journal_mode=WAL")
+            sqlite_ledger_connection.execute("PRAGMA synchronous=NORMAL")
+            sqlite_ledger_connection.execute(
+                "CREATE TABLE IF NOT EXISTS processed_files ("
+                " base TEXT NOT NULL,"
+                " date TEXT NOT NULL,"
+                " path TEXT NOT NULL,"
+                " mtime REAL NOT NULL,"
+                " output_path TEXT,"
+                " size INTEGER,"
+                " duration REAL,"
+                " content_hash TEXT,"
+                " PRIMARY KEY (base, date, path))")
+            columns = {row[1] for row in sqlite_ledger_connection.execute("PRAGMA table_info(processed_files)")}
+            if "content_hash" not in columns:  # content_hash 열이 없던 이전 버전의 DB
+                sqlite_ledger_connection.execute("ALTER TABLE processed_files ADD COLUMN content_hash TEXT")
+            sqlite_ledger_connection.commit()
+        else:
+            commit_sqlite_ledger()
+
+        rows = sqlite_ledger_connection.execute(
+            "SELECT path, mtime FROM processed_files WHERE base = ? AND date = ?",
+            (base_folder_name, target_date_str))
+        processed_files = {file_path: modified_time for file_path, modified_time in rows}
+        sqlite_ledger_key = (base_folder_name, target_date_str)
+        return True
+    except Exception as e:
+        logging.error(f"SQLite 처리 이력 DB 열기 중 오류 발생: {e}")
+        close_sqlite_ledger()  # 다음 스캔에서 DB 연결부터 다시 시도
+        processed_files = {}
+        return False
+
+def commit_sqlite_ledger():
+    """대기 중인 처리 이력 행을 하나의 트랜잭션으로 DB에 기록합니다."""
+    global sqlite_pending_rows
+    if sqlite_ledger_connection is None or not sqlite_pending_rows:
+        return
+    try:
+        with sqlite_ledger_connection:
+            sqlite_ledger_connection.executemany(
+                "INSERT OR REPLACE INTO processed_files"
+                " (base, date, path, mtime, output_path, size, duration, content_hash)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)", sqlite_pending_rows)
+        sqlite_pending_rows = []
+    except Exception as e:
+        logging.error(f"SQLite 처리 이력 기록 중 오류 발생: {e}")
+
+def close_sqlite_ledger():
+    """대기 중인 처리 이력을 기록하고 DB 연결을 닫습니다."""
+    global sqlite_ledger_connection, sqlite_ledger_key
+    if sqlite_ledger_connection is None:
+        return
+    commit_sqlite_ledger()
+    try:
+        sqlite_ledger_connection.close()
+    except Exception as e:
+        logging.error(f"SQLite 처리 이력 DB 닫기 중 오류 발생: {e}")
+    sqlite_ledger_connection = None
+    sqlite_ledger_key = None
+
+def save_ledger_state():
+    """현재 날짜의 처리 이력 상태(처리된 파일 목록, 격리 파일 목록, 텍스트 저널)를 `ledger_states`에 보관합니다."""
+    if ledger_key is not None:
+        ledger_states[ledger_key] = {
+            'processed_files': processed_files,
+            'quarantined_files': quarantined_files,
+            'journal_file': processed_journal_file,
+            'journal_path': processed_journal_path,
+            'journal_line_count': processed_journal_line_count,
+        }
+
+def restore_ledger_state(key):
+    """`ledger_states`에 보관된 날짜의 처리 이력 상태를 현재 상태로 되돌립니다. 보관된 상태가 없으면 False를 반환합니다."""
+    global ledger_key, processed_files, quarantined_files, sqlite_ledger_key
+    global processed_journal_file, processed_journal_path, processed_journal_line_count
+    state = ledger_states.get(key)
+    if state is None:
+        return False
+    processed_files = state['processed_files']
+    quarantined_files = state['quarantined_files']
+    processed_journal_file = state['journal_file']
+    processed_journal_path = state['journal_path']
+    processed_journal_line_count = state['journal_line_count']
+    if sqlite_ledger_connection is not None:
+        sqlite_ledger_key = key
+    ledger_key = key
+    return True
+
+def close_ledger_states(keys):
+    """`ledger_states`에서 주어진 날짜들의 처리 이력 상태를 제거하고 텍스트 저널을 닫습니다."""
+    for key in keys:
+        journal_file = ledger_states.pop(key)['journal_file']
+        if journal_file is None:
+            continue
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                for line in f:
-                    parts = line.strip().split(PROCESSED_FILE_DELIMITER)
-                    if len(parts) == 2:
-                        file_path, timestamp = parts
-                        existing_data[file_path] = timestamp
+            journal_file.close()
         except Exception as e:
-            logging.error(f"기존 처리된 파일 목록 읽기 중 오류 발생: {e}")
+            logging.error(f"처리된 파일 목록 저널 닫기 중 오류 발생: {e}")
 
-    updated_processed_dict = {}
-    for file_path, timestamp in processed_files.items():
-        if os.path.exists(file_path):
-            try:
-                current_modified_time = os.path.getmtime(file_path)
-                updated_processed_dict[file_path] = current_modified_time
-            except FileNotFoundError:
-                logging.warning(f"처리된 목록 저장 중 파일을 찾을 수 없음: {file_path}")
-            except Exception as e:
-                logging.error(f"처리된 목록 저장 중 파일 수정 시간 가져오기 오류: {file_path} - {e}")
+def evict_ledger_states(before_date_str):
+    """`before_date_str` 이전 날짜의 처리 이력 상태를 정리합니다 (이전 날짜의 겹침 시간이 끝나면 호출).
+
+    현재 열려 있는 처리 이력이 정리되는 날짜이면 현재 상태도 비우므로, 다음 스캔에서 처리 대상 날짜의 상태로 바뀝니다.
+    """
+    global ledger_key, processed_files, quarantined_files, sqlite_ledger_key
+    global processed_journal_file, processed_journal_path
+    with processed_files_lock:
+        save_ledger_state()
+        close_ledger_states([key for key in ledger_states if key[1] < before_date_str])
+        if ledger_key is not None and ledger_key not in ledger_states:
+            ledger_key = None
+            sqlite_ledger_key = None
+            processed_files = {}
+            quarantined_files = {}
+            processed_journal_file = None
+            processed_journal_path = None
+
+def open_ledger(config, output_base_folder, base_folder_name, target_date_str):
+    """설정된 방식의 처리 이력을 열고 처리된 파일 목록을 로드합니다.
+
+    설정 파일 [Ledger] backend 값이 'sqlite'이면 `open_sqlite_ledger`를,
+    그 외('text', 기본값)에는 `open_processed_files_journal`을 호출합니다.
+    처리할 날짜가 바뀌면 해당 날짜의 격리 파일 목록도 `load_quarantine_files` 함수로 다시 로드합니다.
+    자정 이후 겹침 시간처럼 두 날짜를 번갈아 스캔할 때 저널 재생과 격리 파일 목록 로드를 반복하지 않도록,
+    바꾸기 전 날짜의 상태는 `ledger_states`에 열어 둔 채로 보관했다가 다시 그 날짜를 스캔할 때 그대로 사용합니다
+    (보관된 상태는 `evict_ledger_states` 또는 `close_ledger` 함수에서 정리).
+    처리 이력을 열지 못하면 False를 반환하며, 호출한 쪽은 이번 스캔을 건너뜁니다.
+    """
+    global ledger_key, processed_journal_file, processed_journal_path
+    key = (base_folder_name, target_date_str)
+    backend = config.get('Ledger', 'backend', fallback=DEFAULT_LEDGER_BACKEND)
+    if ledger_key != key:
+        with processed_files_lock:
+            save_ledger_state()
+            ledger_key = None
+            if (backend != "sqlite" or sqlite_ledger_connection is not None) and restore_ledger_state(key):
+                return True
+            processed_journal_file = None  # 보관된 이전 날짜의 저널은 닫지 않음
+            processed_journal_path = None
+    if backend == "sqlite":
+        if not open_sqlite_ledger(get_sqlite_ledger_path(config), base_folder_name, target_date_str):
+            ledger_key = None
+            return False
+    else:
+        open_processed_files_journal(output_base_folder, base_folder_name, target_date_str)
+    if ledger_key != (base_folder_name, target_date_str):
+        load_quarantine_files(output_base_folder, base_folder_name, target_date_str)
+        ledger_key = (base_folder_name, target_date_str)
+    return True
+
+def record_processed_file(file_path, modified_time, output_path=None, size=None, duration=None, content_hash=None):
+    """변환이 완료된 파일을 처리된 파일 목록과 처리 이력에 기록합니다.
+
+    전역 변수 `processed_files`를 갱신하고, SQLite DB가 열려 있으면 다음 트랜잭션에 기록할 행을 추가하며,
+    텍스트 저널이 열려 있으면 저널 끝에 한 줄을 추가합니다.
+    실제 반영은 `commit_ledger` 함수에서 스캔 주기마다 한 번에 수행합니다.
+    스레드 풀 변환 작업자가 동시에 호출할 수 있으므로 `processed_files_lock`으로 보호합니다.
+    """
+    with processed_files_lock:
+        processed_files[file_path] = modified_time
+        if sqlite_ledger_connection is not None and sqlite_ledger_key is not None:
+            base_folder_name, target_date_str = sqlite_ledger_key
+            sqlite_pending_rows.append((base_folder_name, target_date_str, file_path, modified_time,
+                                        output_path, size, duration, content_hash))
         else:
-            logging.warning(f"처리된 목록에 파일 경로가 없음: {file_path}")
+            append_processed_files_journal(file_path, modified_time)
+
+def commit_ledger():
+    """스캔 주기마다 처리 이력을 반영합니다 (SQLite: 트랜잭션 커밋, 텍스트: 저널 flush)."""
+    with processed_files_lock:
+        commit_sqlite_ledger()
+        flush_processed_files_journal()
+
+def close_ledger():
+    """열려 있는 처리 이력을 모두 반영하고 닫습니다 (`ledger_states`에 보관된 날짜 포함)."""
+    global ledger_key, processed_journal_file, processed_journal_path
+    save_ledger_state()
+    close_sqlite_ledger()
+    close_ledger_states(list(ledger_states))
+    ledger_key = None
+    processed_journal_file = None
+    processed_journal_path = None
 
-    for file_path, timestamp in updated_processed_dict.items():
-        existing_data[file_path] = str(timestamp)  # 업데이트 또는 추가
+def get_jpg_output_path(input_path, output_base_folder, watch_base_folder, relative_path=None):
+    """PNG 파일의 JPG 출력 경로를 생성합니다.
 
+    경로는 'output_base_folder/mccb/Base 폴더 이름/감시 폴더 기준 상대 경로(확장자 .jpg)' 형식이며,
+    스캔에서 이미 알고 있는 `relative_path`가 주어지면 그대로 사용합니다.
+    """
+    if relative_path is None:
+        relative_path = os.path.relpath(input_path, watch_base_folder)
+    base_name = os.path.basename(watch_base_folder.rstrip('\\'))
+    filename, _ = os.path.splitext(relative_path)
+    return os.path.join(output_base_folder, "mccb", base_name, f"{filename}.jpg")
+
+def is_output_up_to_date(output_path, source_mtime):
+    """출력 JPG 파일이 같은 원본 PNG로부터 만들어졌는지 확인합니다.
+
+    `convert_png_to_jpg` 함수는 JPG의 수정 시간을 원본 PNG의 수정 시간으로 맞추므로,
+    JPG가 있고 수정 시간이 `source_mtime`과 같으면 True를 반환합니다 (파일이 없으면 False).
+    """
     try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            for file_path, timestamp in existing_data.items():
-                f.write(f"{file_path}{PROCESSED_FILE_DELIMITER}{timestamp}\n")
-            f.flush()
-    except Exception as e:
-        logging.error(f"처리된 파일 목록 쓰기 중 오류 발생: {e}")
+        return abs(os.stat(output_path).st_mtime - source_mtime) < OUTPUT_MTIME_TOLERANCE_SEC
+    except OSError:
+        return False
+
+def prepare_jpeg_image(img, input_path):
+    """JPEG로 저장할 수 있도록 이미지를 흑백('L') 또는 컬러('RGB') 모드로 맞춥니다.
+
+    전역 변수 `GLOBAL_GRAYSCALE_MODE`가 True이면 흑백, False이면 컬러로 변환하고,
+    None이면 흑백 이미지는 그대로 두고 나머지는 컬러로 변환합니다 (알 수 없는 모드는 경고 후 컬러로 변환).
+    """
+    if GLOBAL_GRAYSCALE_MODE is True:
+        return img.convert('L')
+    if GLOBAL_GRAYSCALE_MODE is False:
+        return img.convert('RGB')
+    if img.mode in ('L', 'RGB'):
+        return img
+    if img.mode not in ('RGBA', 'P'):
+        logging.warning(f"알 수 없는 이미지 모드 '{img.mode}': {input_path}. RGB로 변환합니다.")
+    return img.convert('RGB')
+
+def encode_jpeg_pillow(img, quality):
+    """Pillow로 JPEG 인코딩합니다 (기본 인코더)."""
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=quality)
+    return buffer.getvalue()
+
+def encode_jpeg_opencv(img, quality):
+    """OpenCV `cv2.imencode`로 JPEG 인코딩합니다 (OpenCV는 BGR 순서이므로 컬러는 채널 순서를 바꿈)."""
+    pixels = np.asarray(img)
+    if img.mode == 'RGB':
+        pixels = cv2.cvtColor(pixels, cv2.COLOR_RGB2BGR)
+    success, encoded = cv2.imencode(".jpg", pixels, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not success:
+        raise ValueError("cv2.imencode 실패")
+    return encoded.tobytes()
 
-def convert_png_to_jpg(input_path, output_base_folder, watch_base_folder, quality):
+def encode_jpeg_simplejpeg(img, quality):
+    """simplejpeg(libjpeg-turbo)로 JPEG 인코딩합니다."""
+    if img.mode == 'L':
+        return simplejpeg.encode_jpeg(np.asarray(img)[:, :, None], quality=quality, colorspace='GRAY',
+                                      colorsubsampling='Gray')
+    return simplejpeg.encode_jpeg(np.asarray(img), quality=quality, colorspace='RGB', colorsubsampling='420')
+
+def encode_jpeg_turbojpeg(img, quality):
+    """PyTurboJPEG(libjpeg-turbo)로 JPEG 인코딩합니다 (라이브러리는 처음 호출할 때 한 번 로드)."""
+    global turbojpeg_instance
+    if turbojpeg_instance is None:
+        turbojpeg_instance = turbojpeg.TurboJPEG()
+    if img.mode == 'L':
+        return turbojpeg_instance.encode(np.asarray(img)[:, :, None], quality=quality,
+                                         pixel_format=turbojpeg.TJPF_GRAY, jpeg_subsample=turbojpeg.TJSAMP_GRAY)
+    return turbojpeg_instance.encode(np.asarray(img), quality=quality,
+                                     pixel_format=turbojpeg.TJPF_RGB, jpeg_subsample=turbojpeg.TJSAMP_420)
+
+JPEG_ENCODERS = {  # JPEG 인코더 이름: (인코딩 함수, 필요한 모듈)
+    "pillow": (encode_jpeg_pillow, ()),
+    "opencv": (encode_jpeg_opencv, (np, cv2)),
+    "simplejpeg": (encode_jpeg_simplejpeg, (np, simplejpeg)),
+    "turbojpeg": (encode_jpeg_turbojpeg, (np, turbojpeg)),
+}
+
+def get_available_encoders():
+    """설치되어 사용할 수 있는 JPEG 인코더 이름 목록을 반환합니다.
+
+    필요한 모듈이 모두 설치되어 있어야 하며, turbojpeg는 libjpeg-turbo 라이브러리를 로드할 수 있는지도 확인합니다.
+    확인 결과는 전역 변수 `available_jpeg_encoders`에 보관하여 처음 한 번만 확인합니다.
+    """
+    global available_jpeg_encoders
+    if available_jpeg_encoders is not None:
+        return available_jpeg_encoders
+    available_jpeg_encoders = []
+    for name, (_, modules) in JPEG_ENCODERS.items():
+        if any(module is None for module in modules):
+            continue
+        if name == "turbojpeg":
+            try:
+                encode_jpeg_turbojpeg(Image.new('L', (8, 8)), 80)
+            except Exception:
+                continue
+        available_jpeg_encoders.append(name)
+    return available_jpeg_encoders
+
+def resolve_jpeg_encoder(config):
+    """설정 파일 [Image] encoder의 JPEG 인코더를 사용할 수 있는지 확인하고 이름을 반환합니다.
+
+    설정한 인코더가 없거나 설치되지 않았으면 처음 한 번 경고하고 기본 인코더(pillow)를 사용합니다.
+    """
+    encoder = config.get('Image', 'encoder', fallback=DEFAULT_JPEG_ENCODER).strip().lower()
+    if encoder == DEFAULT_JPEG_ENCODER:
+        return encoder
+    if encoder not in get_available_encoders():
+        if encoder not in unavailable_jpeg_encoders:
+            unavailable_jpeg_encoders.add(encoder)
+            logging.warning(f"JPEG 인코더 '{encoder}'을(를) 사용할 수 없어 {DEFAULT_JPEG_ENCODER}를 사용합니다.")
+            print(f"경고: JPEG 인코더 '{encoder}'을(를) 사용할 수 없어 {DEFAULT_JPEG_ENCODER}를 사용합니다.")
+        return DEFAULT_JPEG_ENCODER
+    return encoder
+
+def save_jpeg(img, output_path, quality, encoder=DEFAULT_JPEG_ENCODER):
+    """이미지를 지정한 JPEG 인코더로 인코딩하여 파일에 저장합니다.
+
+    pillow는 파일에 바로 저장하고, 다른 인코더는 인코딩한 바이트를 한 번에 씁니다.
+    """
+    if encoder == DEFAULT_JPEG_ENCODER:
+        img.save(output_path, "JPEG", quality=quality)
+        return
+    encoded = JPEG_ENCODERS[encoder][0](img, quality)
+    with open(output_path, 'wb') as f:
+        f.write(encoded)
+
+def write_jpeg_output(img, final_output_path, quality, source_mtime=None, encoder=DEFAULT_JPEG_ENCODER):
+    """이미지를 임시 파일(.temp)에 JPEG로 저장한 후 `os.replace` 한 번으로 최종 경로에 놓습니다.
+
+    출력 폴더는 처음 한 번만 만들고 `created_output_folders`에 기억합니다.
+    보관 작업 등으로 출력 폴더가 삭제되어 저장 중 FileNotFoundError가 발생하면,
+    폴더를 기억 목록에서 지우고 다시 만든 후 한 번 더 저장합니다.
+    """
+    output_dir = os.path.dirname(final_output_path)
+    temp_output_path = f"{final_output_path}.temp"
+    for retry in (False, True):
+        if output_dir not in created_output_folders:
+            os.makedirs(output_dir, exist_ok=True)
+            created_output_folders.add(output_dir)
+        try:
+            save_jpeg(img, temp_output_path, quality, encoder)
+            if source_mtime is not None:
+                os.utime(temp_output_path, (source_mtime, source_mtime))
+            os.replace(temp_output_path, final_output_path)
+            return
+        except FileNotFoundError:
+            if retry:
+                raise
+            created_output_folders.discard(output_dir)
+
+def convert_png_to_jpg(input_path, output_base_folder, watch_base_folder, quality, relative_path=None, data=None,
+                       source_mtime=None, encoder=DEFAULT_JPEG_ENCODER):
     """PNG 이미지를 JPG 형식으로 변환합니다.
 
     입력 PNG 파일 경로, 출력 기본 폴더, 감시 기본 폴더, 그리고 JPG 품질을 인자로 받습니다.
-    입력 파일의 상대 경로를 기준으로 출력 폴더 구조를 생성하고,
-    PNG 파일을 JPG로 변환하여 저장합니다.
-    변환 전에 임시 파일(.temp)을 생성하고, 변환 완료 후 최종 파일명으로 변경합니다.
-    기존에 동일한 이름의 JPG 파일이 존재하면 삭제합니다.
+    `get_jpg_output_path` 함수로 입력 파일의 상대 경로를 기준으로 출력 경로를 만들고,
+    PNG 파일을 JPG로 변환하여 `write_jpeg_output` 함수로 저장합니다 (출력 폴더는 처음 한 번만 생성).
+    이미 읽어 둔 PNG 파일 내용(`data`)이 주어지면 파일을 다시 읽지 않고 메모리에서 디코딩합니다.
+    변환 결과를 임시 파일(.temp)에 저장한 후 `os.replace` 한 번으로 최종 파일명으로 바꾸므로,
+    기존 JPG 파일이 있어도 미리 확인하거나 삭제하지 않고 원자적으로 교체합니다.
+    원본 수정 시간(`source_mtime`)이 주어지면 JPG의 수정 시간을 같은 값으로 맞춰, 다시 실행할 때
+    `is_output_up_to_date` 함수로 이미 변환된 파일인지 확인할 수 있도록 합니다.
+    JPEG 인코딩은 `save_jpeg` 함수로 `encoder`(기본값: pillow)를 사용합니다.
     전역 변수 `GLOBAL_GRAYSCALE_MODE` 값에 따라 흑백 또는 컬러로 변환합니다.
-    변환 성공 시 `processed_files` 딕셔너리에 파일 경로와 수정 시간을 기록합니다.
-    발생할 수 있는 파일 관련 예외 (FileNotFoundError, PermissionError 등) 및
-    이미지 처리 관련 예외 (UnidentifiedImageError 등)를 처리하고 로깅합니다.
+    (최종 JPG 파일 경로 또는 None, 실패 종류 또는 None) 튜플을 반환합니다.
+    PNG를 디코딩하는 중의 이미지 오류 (UnidentifiedImageError, 잘린 파일 등)는 `CONVERT_ERROR_CONTENT`,
+    입력 파일 읽기 또는 출력/스테이징 폴더 쓰기 중의 파일 관련 예외 (FileNotFoundError, PermissionError 등)는
+    `CONVERT_ERROR_IO`로 구분하여 로깅합니다.
     """
     global GLOBAL_GRAYSCALE_MODE
-    global processed_files
 
     try:
         print(f"PNG 변환 시도: {input_path}")
-        img = Image.open(input_path)
+        img = Image.open(io.BytesIO(data) if data is not None else input_path)
+        img.load()  # 디코딩 오류를 출력 파일 쓰기 오류와 구분하기 위해 여기서 디코딩
+        img = prepare_jpeg_image(img, input_path)
+    except FileNotFoundError:
+        logging.error(f"오류 - 입력 파일을 찾을 수 없음: {input_path}")
+        return None, CONVERT_ERROR_IO
+    except PermissionError:
+        logging.error(f"오류 - 입력 파일 접근 권한 거부: {input_path}")
+        return None, CONVERT_ERROR_IO
+    except Image.UnidentifiedImageError:
+        logging.error(f"오류 - 이미지 파일을 열거나 읽을 수 없음: {input_path}")
+        return None, CONVERT_ERROR_CONTENT
+    except OSError as e:
+        if e.errno is None:  # Pillow 디코딩 오류 (잘린 파일 등)
+            logging.error(f"오류 - 이미지 디코딩 실패: {input_path} - {e}")
+            return None, CONVERT_ERROR_CONTENT
+        logging.error(f"오류 - 입력 파일 읽기 실패: {input_path} - {e}")
+        return None, CONVERT_ERROR_IO
+    except Exception as e:
+        logging.error(f"PNG 디코딩 중 예기치 않은 오류 발생: {input_path} - {e}")
+        return None, CONVERT_ERROR_CONTENT
 
-        relative_path = os.path.relpath(input_path, watch_base_folder)
-        base_name = os.path.basename(watch_base_folder.rstrip('\\'))
-        output_path = os.path.join(output_base_folder, "mccb", base_name, relative_path)
-        output_dir = os.path.dirname(output_path)
-        os.makedirs(output_dir, exist_ok=True)
+    final_output_path = get_jpg_output_path(input_path, output_base_folder, watch_base_folder, relative_path)
+    try:
+        write_jpeg_output(img, final_output_path, quality, source_mtime, encoder)
+    except OSError as e:
+        logging.error(f"오류 - JPG 파일 쓰기 실패: {input_path} → {output_base_folder} - {e}")
+        return None, CONVERT_ERROR_IO
+    except Exception as e:
+        logging.error(f"JPG 인코딩 중 예기치 않은 오류 발생: {input_path} - {e}")
+        return None, CONVERT_ERROR_CONTENT
+    print(f"변환 완료: {input_path} → {final_output_path} (품질: {quality}, 모드: {'흑백' if GLOBAL_GRAYSCALE_MODE else '컬러'})")
+    return final_output_path, None
 
-        filename, _ = os.path.splitext(os.path.basename(input_path))
-        temp_output_path = os.path.join(output_dir, f"{filename}.jpg.temp")
-        final_output_path = os.path.join(output_dir, f"{filename}.jpg")
+def init_convert_worker(log_folder, base_folder_name, grayscale_mode):
+    """프로세스 풀의 각 변환 작업자 프로세스를 초기화합니다.
 
-        for path in [temp_output_path, final_output_path]:
-            if os.path.exists(path):
-                try:
-                    os.remove(path)
-                    print(f"기존 파일 삭제: {path}")
-                except Exception as e:
-                    logging.error(f"기존 파일 삭제 오류 {path}: {e}")
-                    return
-
-        if GLOBAL_GRAYSCALE_MODE is True:
-            img = img.convert('L')
-            img.save(temp_output_path, "JPEG", quality=quality)
-        elif GLOBAL_GRAYSCALE_MODE is False:
-            img = img.convert('RGB')
-            img.save(temp_output_path, "JPEG", quality=quality)
+    작업자 프로세스에서도 변환 오류가 같은 로그 파일에 기록되도록 로깅을 설정하고,
+    부모 프로세스의 이미지 모드(`GLOBAL_GRAYSCALE_MODE`)를 그대로 사용하도록 설정합니다.
+    """
+    global GLOBAL_GRAYSCALE_MODE
+    setup_logging(log_folder, base_folder_name)
+    GLOBAL_GRAYSCALE_MODE = grayscale_mode
+
+def read_png_bytes(file_path):
+    """PNG 파일 전체를 한 번의 큰 읽기로 가져옵니다.
+
+    Pillow가 파일에서 직접 디코딩하면 청크마다 작은 읽기를 반복하므로, SMB 공유 폴더에서는 파일 하나에 수십 번의 네트워크 왕복이 생깁니다.
+    버퍼링 없이 열어 `read()` 한 번으로 읽으면 SMB 클라이언트가 큰 읽기 요청 몇 번으로 처리합니다.
+    읽기 중 오류가 발생하면 로깅하고 None을 반환합니다.
+    """
+    try:
+        with open(file_path, 'rb', buffering=0) as f:
+            return f.read()
+    except OSError as e:
+        logging.error(f"PNG 파일 읽기 중 오류 발생: {file_path} - {e}")
+        return None
+
+def convert_png_task(candidate, output_base_folder, watch_base_folder, quality, read_mode=DEFAULT_READ_MODE,
+                     encoder=DEFAULT_JPEG_ENCODER, hash_content=False):
+    """한 개의 PNG 파일을 변환하고 결과를 반환합니다 (변환 작업자에서 실행되는 단위 작업).
+
+    `convert_png_to_jpg` 함수를 호출하고, 처리 이력 기록에 필요한 값을
+    (`PngCandidate`, 출력 파일 경로 또는 None, 변환 소요 시간, PNG 내용 해시 또는 None, 실패 종류 또는 None) 튜플로 반환합니다.
+    파일 크기와 수정 시간은 스캔에서 얻은 값을 그대로 사용하므로 파일 정보를 다시 가져오지 않습니다.
+    `read_mode`가 'slurp'이면 `read_png_bytes` 함수로 파일을 한 번에 읽고, 같은 내용으로 완전성 확인
+    (크기가 스캔 때와 같거나 끝에 IEND 청크가 있는지)과 메모리 디코딩을 모두 수행합니다.
+    SHA-1 내용 해시는 처리 이력에 저장할 때(`hash_content`, SQLite 처리 이력)만 같은 내용으로 계산합니다.
+    `prefetch_stage`가 미리 읽어 둔 내용(`candidate.data`)이 있으면 파일을 읽지 않고 그 내용을 사용하며,
+    결과로 돌려보낼 때 내용을 다시 전달하지 않도록 `candidate.data`를 비웁니다.
+    작업자 프로세스에서 실행되므로 `processed_files`는 부모 프로세스가 이 결과로 갱신합니다.
+    """
+    start_time = time.perf_counter()
+    data = candidate.data
+    candidate.data = None
+    content_hash = None
+    if data is None and read_mode == "slurp":
+        data = read_png_bytes(candidate.path)
+    if data is not None:
+        if len(data) != candidate.size and not data.endswith(PNG_IEND_TRAILER):
+            logging.error(f"오류 - 스캔 이후 파일이 바뀌어 완전하지 않음: {candidate.path} "
+                          f"(스캔 크기 {candidate.size}, 읽은 크기 {len(data)})")
+            return candidate, None, time.perf_counter() - start_time, None, CONVERT_ERROR_CONTENT
+        if hash_content:
+            content_hash = hashlib.sha1(data).hexdigest()
+    output_path, error_kind = convert_png_to_jpg(candidate.path, output_base_folder, watch_base_folder, quality,
+                                                 candidate.relative_path, data, candidate.mtime, encoder)
+    return candidate, output_path, time.perf_counter() - start_time, content_hash, error_kind
+
+def convert_and_record_png_task(candidate, output_base_folder, watch_base_folder, quality, read_mode=DEFAULT_READ_MODE,
+                                encoder=DEFAULT_JPEG_ENCODER, hash_content=False):
+    """한 개의 PNG 파일을 변환하고 작업자 스레드에서 바로 처리 이력에 기록합니다 (스레드 풀 변환용).
+
+    Pillow는 zlib 압축 해제와 JPEG 인코딩 중 GIL을 해제하므로 여러 스레드가 동시에 변환할 수 있습니다.
+    모든 스레드가 같은 `processed_files`를 사용하며, 기록은 `record_processed_file`의 잠금으로 보호됩니다.
+    변환 결과는 실패 처리를 위해 그대로 반환합니다.
+    """
+    result = convert_png_task(candidate, output_base_folder, watch_base_folder, quality, read_mode, encoder, hash_content)
+    record_convert_result(result)
+    return result
+
+def get_convert_executor(config, base_folder_name):
+    """설정된 변환 방식에 맞는 작업자 풀을 반환합니다.
+
+    설정 파일 [Processing] convert_mode 값이 'process'이면 `ProcessPoolExecutor`를,
+    'thread'이면 `ThreadPoolExecutor`를 [Processing] num_workers 개의 작업자로
+    처음 호출할 때 한 번 만들어 재사용하고, 'serial'(기본값)이면 None을 반환합니다.
+    """
+    global convert_executor
+    convert_mode = config.get('Processing', 'convert_mode', fallback=DEFAULT_CONVERT_MODE)
+    if convert_mode not in ("process", "thread"):
+        return None
+    if convert_executor is None:
+        num_workers = config.getint('Processing', 'num_workers', fallback=DEFAULT_NUM_WORKERS)
+        if convert_mode == "thread":
+            convert_executor = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="convert")
         else:
-            if img.mode == 'L':
-                img.save(temp_output_path, "JPEG", quality=quality)
-            elif img.mode in ('RGBA', 'P'):
-                img = img.convert('RGB')
-                img.save(temp_output_path, "JPEG", quality=quality)
-            elif img.mode == 'RGB':
-                img.save(temp_output_path, "JPEG", quality=quality)
-            else:
-                logging.warning(f"알 수 없는 이미지 모드 '{img.mode}': {input_path}. RGB로 변환합니다.")
-                img = img.convert('RGB')
-                img.save(temp_output_path, "JPEG", quality=quality)
+            log_folder = config['Paths']['log_folder']
+            convert_executor = ProcessPoolExecutor(max_workers=num_workers, initializer=init_convert_worker,
+                                                   initargs=(log_folder, base_folder_name, GLOBAL_GRAYSCALE_MODE))
+        print(f"[{base_folder_name}] 병렬 변환 시작 ({convert_mode}, 작업자 {num_workers}개)")
+    return convert_executor
+
+def shutdown_convert_executor():
+    """작업자 풀이 있으면 진행 중인 변환이 끝날 때까지 기다린 후 종료합니다."""
+    global convert_executor
+    if convert_executor is None:
+        return
+    convert_executor.shutdown(wait=True)
+    convert_executor = None
+
+def record_convert_result(result):
+    """`convert_png_task`의 결과로 변환에 성공한 파일을 처리 이력에 기록합니다."""
+    candidate, output_path, duration, content_hash, _ = result
+    if output_path:
+        record_processed_file(candidate.path, candidate.mtime, output_path, candidate.size, duration, content_hash)
+
+class PngCandidate:
+    """스캔에서 발견된 PNG 파일 한 개의 정보입니다.
+
+    폴더 나열 시 얻은 stat 결과(크기, 최종 수정 시간)와 감시 폴더 기준 상대 경로를
+    필터 → 안정성 확인 → 변환 → 기록 단계까지 그대로 전달하여, 파일마다 stat을 반복하지 않도록 합니다.
+    (SMB 공유 폴더에서는 stat 한 번이 네트워크 왕복 한 번입니다.)
+    `data`는 `prefetch_stage`가 미리 읽어 둔 파일 내용이며, 변환 작업에서 사용한 후 비웁니다.
+    """
+    __slots__ = ('path', 'size', 'mtime', 'relative_path', 'data')
 
-        os.rename(temp_output_path, final_output_path)
-        print(f"변환 완료: {input_path} → {final_output_path} (품질: {quality}, 모드: {'흑백' if GLOBAL_GRAYSCALE_MODE else '컬러'})")
-        processed_files[input_path] = os.path.getmtime(input_path)
+    def __init__(self, path, size, mtime, relative_path):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.relative_path = relative_path
+        self.data = None
+
+def get_target_leaf_folders(watch_folder, target_date):
+    """폴더 구조 규칙으로부터 처리 대상 말단 폴더 목록을 생성합니다.
+
+    'watch_folder/{NG,OK,NG_OK}/YYYYMM/{LEFT,LINE,...}' 규칙에 따라
+    대상 연월의 (말단 폴더 경로, 감시 폴더 기준 상대 경로) 목록(3 x 7 = 21개)을 디렉터리 탐색 없이 바로 만들어 반환합니다.
+    """
+    year_month = target_date.strftime("%Y%m")
+    leaf_folders = []
+    for category in TARGET_CATEGORY_FOLDERS:
+        for camera in TARGET_CAMERA_FOLDERS:
+            relative_folder = os.path.join(category, year_month, camera)
+            leaf_folders.append((os.path.join(watch_folder, relative_folder), relative_folder))
+    return leaf_folders
+
+def get_day_bounds(target_date):
+    """처리 대상 날짜의 시작/끝 시각을 타임스탬프로 반환합니다.
+
+    파일마다 `datetime.fromtimestamp`로 날짜를 만들지 않고 수정 시간을 이 범위와 비교하여 날짜를 확인합니다.
+    """
+    day_start = datetime.combine(target_date, datetime.min.time())
+    return day_start.timestamp(), (day_start + timedelta(days=1)).timestamp()
+
+def list_png_files(leaf_folder):
+    """말단 폴더를 `os.scandir`로 한 번 나열하여 PNG 파일의 {파일 경로: (크기, 최종 수정 시간)}을 반환합니다."""
+    png_files = {}
+    with os.scandir(leaf_folder) as entries:
+        for entry in entries:
+            if entry.name.lower().endswith(".png") and entry.is_file():
+                stat_result = entry.stat()
+                png_files[entry.path] = (stat_result.st_size, stat_result.st_mtime)
+    return png_files
+
+def is_recheck_needed(png_path, modified_time, day_bounds):
+    """변경되지 않은 말단 폴더의 캐시된 파일을 다시 확인해야 하는지 판단합니다.
+
+    처리 대상 날짜(`day_bounds` 범위)의 파일 중 아직 처리되지 않았거나,
+    안정성 확인 대기 중이거나, 변환 실패 후 재시도 시각이 된 파일만 True입니다.
+    같은 수정 시간으로 격리되었거나 재시도 시각이 아직 되지 않은 파일(`is_conversion_deferred`)은
+    어차피 규칙 필터 단계에서 건너뛰므로 다시 stat하지 않습니다.
+    """
+    if png_path in pending_files:
+        return True
+    if is_conversion_deferred(png_path, modified_time):
+        return False
+    if png_path in failed_files:
+        return True
+    return processed_files.get(png_path) != modified_time and day_bounds[0] <= modified_time < day_bounds[1]
+
+def stat_png_candidate(png_path, relative_path):
+    """파일 정보를 한 번 가져와 `PngCandidate`를 만듭니다. 파일이 없거나 오류가 발생하면 None을 반환합니다."""
+    try:
+        stat_result = os.stat(png_path)
+        return PngCandidate(png_path, stat_result.st_size, stat_result.st_mtime, relative_path)
     except FileNotFoundError:
-        logging.error(f"오류 - 입력 파일을 찾을 수 없음: {input_path}")
-    except PermissionError:
-        logging.error(f"오류 - 파일 접근 권한 거부: {input_path} 또는 {output_base_folder}")
-    except Image.UnidentifiedImageError:
-        logging.error(f"오류 - 이미지 파일을 열거나 읽을 수 없음: {input_path}")
+        return None
+    except Exception as e:
+        logging.error(f"파일 정보 가져오기 오류: {png_path} - {e}")
+        return None
+
+def scan_leaf_folder(leaf_folder, relative_folder, day_bounds, use_dir_cache, dir_cache_max_age):
+    """말단 폴더 하나를 확인하여 PNG 파일의 `PngCandidate` 목록을 반환합니다.
+
+    `use_dir_cache`가 True이면 말단 폴더의 수정 시간을 먼저 확인하여, 지난 나열 이후 바뀌지 않은 폴더는
+    다시 나열하지 않고 캐시(`dir_scan_cache`)에서 다시 확인이 필요한 파일(`is_recheck_needed`)만 반환합니다.
+    파일 내용만 바뀐 경우에는 폴더 수정 시간이 바뀌지 않으므로, `dir_cache_max_age`초가 지나면 폴더를 다시 나열합니다.
+    새로 나열한 파일은 `DirEntry.stat()` 결과를 그대로 사용하고, 캐시에서 다시 확인하는 파일만 stat을 새로 가져와
+    캐시에 다시 저장합니다 (쓰는 중에 나열된 파일이 변환된 후에는 더 이상 다시 확인하지 않음).
+    말단 폴더가 아직 없으면 빈 목록을 반환하고, 폴더 나열 중 오류가 발생하면 로깅합니다.
+    """
+    global dir_scan_cache_dirty
+    candidates = []
+    try:
+        if use_dir_cache:
+            dir_modified_time = os.stat(leaf_folder).st_mtime
+            cached = dir_scan_cache.get(leaf_folder)
+            if cached is not None and cached[0] == dir_modified_time and \
+               time.time() - cached[2] < dir_cache_max_age:
+                cached_files = cached[1]
+                for png_path, (_, modified_time) in list(cached_files.items()):
+                    if is_recheck_needed(png_path, modified_time, day_bounds):
+                        candidate = stat_png_candidate(
+                            png_path, os.path.join(relative_folder, os.path.basename(png_path)))
+                        if candidate is not None:
+                            candidates.append(candidate)
+                            if cached_files[png_path] != (candidate.size, candidate.mtime):
+                                cached_files[png_path] = (candidate.size, candidate.mtime)
+                                dir_scan_cache_dirty = True
+                return candidates
+
+        png_files = list_png_files(leaf_folder)
+        if use_dir_cache:
+            dir_scan_cache[leaf_folder] = (dir_modified_time, png_files, time.time())
+            dir_scan_cache_dirty = True
+        for png_path, (size, modified_time) in png_files.items():
+            candidates.append(PngCandidate(png_path, size, modified_time,
+                                           os.path.join(relative_folder, os.path.basename(png_path))))
+    except FileNotFoundError:
+        if dir_scan_cache.pop(leaf_folder, None) is not None:
+            dir_scan_cache_dirty = True
+    except Exception as e:
+        logging.error(f"폴더 나열 중 오류 발생: {leaf_folder} - {e}")
+    return candidates
+
+def iter_target_png_files(watch_folder, target_date, use_dir_cache=False, dir_cache_max_age=DEFAULT_DIR_CACHE_MAX_AGE_SEC,
+                          list_workers=DEFAULT_LIST_WORKERS):
+    """처리 대상 말단 폴더에 있는 PNG 파일을 `PngCandidate`로 순회합니다.
+
+    `get_target_leaf_folders` 함수로 만든 말단 폴더만 `os.scandir`로 나열하므로,
+    Base 폴더 전체를 `os.walk`로 탐색하지 않고 대상 연월의 파일 수에 비례하는 비용으로 스캔합니다.
+    각 말단 폴더는 `scan_leaf_folder` 함수로 확인합니다 (폴더 수정 시간 캐시 사용 여부 포함).
+    `list_workers`가 2 이상이면 스레드 풀로 말단 폴더들을 동시에 나열하고, 먼저 끝난 폴더의 파일부터 내보냅니다.
+    폴더 나열 한 번에 수십 ms가 걸리는 네트워크 공유 폴더에서, 스캔 시간이 모든 폴더 나열 시간의 합이 아니라
+    가장 느린 폴더의 나열 시간에 가까워집니다.
+    """
+    global list_executor
+    day_bounds = get_day_bounds(target_date)
+    leaf_folders = get_target_leaf_folders(watch_folder, target_date)
+    if list_workers <= 1:
+        for leaf_folder, relative_folder in leaf_folders:
+            yield from scan_leaf_folder(leaf_folder, relative_folder, day_bounds, use_dir_cache, dir_cache_max_age)
+        return
+
+    if list_executor is None:
+        list_executor = ThreadPoolExecutor(max_workers=list_workers, thread_name_prefix="list")
+    futures = [list_executor.submit(scan_leaf_folder, leaf_folder, relative_folder, day_bounds, use_dir_cache,
+                                    dir_cache_max_age)
+               for leaf_folder, relative_folder in leaf_folders]
+    for future in as_completed(futures):
+        yield from future.result()
+
+def shutdown_list_executor():
+    """말단 폴더 동시 나열용 스레드 풀이 있으면 종료합니다."""
+    global list_executor
+    if list_executor is None:
+        return
+    list_executor.shutdown(wait=True)
+    list_executor = None
+
+def get_scan_snapshot_path(output_base_folder, base_folder_name):
+    """스캔 스냅샷 파일 경로를 생성합니다.
+
+    경로는 'output_base_folder/mccb/base_folder_name/Processed_files/base_folder_name_scan_snapshot.json' 형식입니다.
+    """
+    return os.path.join(output_base_folder, "mccb", base_folder_name, "Processed_files",
+                        f"{base_folder_name}{SCAN_SNAPSHOT_SUFFIX}")
+
+def save_scan_snapshot(output_base_folder, base_folder_name):
+    """말단 폴더 나열 결과 캐시(`dir_scan_cache`)를 스냅샷 파일로 저장합니다.
+
+    폴더별로 폴더 수정 시간, PNG 파일 이름별 (크기, 최종 수정 시간)을 JSON으로 저장합니다.
+    지난 저장 이후 캐시가 바뀌지 않았으면 저장하지 않습니다.
+    임시 파일(.temp)에 쓴 후 `os.replace`로 교체하므로 저장 중 종료되어도 이전 스냅샷이 남습니다.
+    저장 중 오류가 발생하면 로깅합니다.
+    """
+    global dir_scan_cache_dirty
+    if not dir_scan_cache_dirty:
+        return
+    snapshot = {
+        leaf_folder: [dir_modified_time,
+                      {os.path.basename(png_path): list(stat_info) for png_path, stat_info in png_files.items()}]
+        for leaf_folder, (dir_modified_time, png_files, _) in dir_scan_cache.items()
+    }
+    filepath = get_scan_snapshot_path(output_base_folder, base_folder_name)
+    temp_path = f"{filepath}.temp"
+    try:
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_path, filepath)
+        dir_scan_cache_dirty = False
+    except Exception as e:
+        logging.error(f"스캔 스냅샷 저장 중 오류 발생: {filepath} - {e}")
+
+def load_scan_snapshot(output_base_folder, base_folder_name):
+    """스캔 스냅샷 파일을 읽어 말단 폴더 나열 결과 캐시(`dir_scan_cache`)를 복원합니다.
+
+    재시작 직후 첫 스캔에서 스냅샷 이후 바뀐 폴더만 다시 나열하도록, 복원된 항목의 나열 시각은 현재 시각으로 설정합니다.
+    항목 수가 함께 저장된 이전 형식([폴더 수정 시간, 항목 수, 파일 목록])의 스냅샷도 읽을 수 있습니다.
+    스냅샷이 없으면 아무 작업도 하지 않고, 읽기 중 오류가 발생하면 로깅합니다.
+    """
+    filepath = get_scan_snapshot_path(output_base_folder, base_folder_name)
+    if not os.path.exists(filepath):
+        return
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        loaded_time = time.time()
+        for leaf_folder, entry in snapshot.items():
+            dir_modified_time, png_files = entry[0], entry[-1]
+            dir_scan_cache[leaf_folder] = (
+                dir_modified_time,
+                {os.path.join(leaf_folder, filename): tuple(stat_info) for filename, stat_info in png_files.items()},
+                loaded_time)
+        print(f"[{base_folder_name}] 스캔 스냅샷 로드: 폴더 {len(snapshot)}개")
     except Exception as e:
-        logging.error(f"PNG 변환 중 예기치 않은 오류 발생: {input_path} - {e}")
+        logging.error(f"스캔 스냅샷 로드 중 오류 발생: {filepath} - {e}")
 
-def is_file_stable(file_path, wait_time=1):
-    """파일이 완전히 쓰여졌는지 확인합니다.
+def get_file_size_and_mtime(file_path):
+    """파일 크기와 최종 수정 시간을 한 번의 stat 호출로 가져옵니다.
 
-    주어진 파일 경로의 초기 크기를 확인한 후, 지정된 시간(기본값 1초) 동안 기다립니다.
-    기다린 후 파일의 현재 크기를 다시 확인하여 초기 크기와 동일하고, 파일 크기가 0보다 큰지 확인합니다.
-    이를 통해 파일이 현재 쓰여지고 있지 않고 완전히 저장되었는지 판단합니다.
-    파일을 찾을 수 없거나 권한 오류가 발생하면 로깅하고 False를 반환합니다.
-    기타 예외 발생 시에도 로깅하고 False를 반환합니다.
+    파일을 찾을 수 없거나 권한 오류 등이 발생하면 로깅하고 None을 반환합니다.
     """
     try:
-        initial_size = os.path.getsize(file_path)
-        time.sleep(wait_time)
-        current_size = os.path.getsize(file_path)
-        return initial_size == current_size and current_size > 0
+        stat_result = os.stat(file_path)
+        return stat_result.st_size, stat_result.st_mtime
     except FileNotFoundError:
         logging.error(f"오류: 안정성 확인 중 파일을 찾을 수 없음: {file_path}")
-        return False
     except PermissionError:
         logging.error(f"오류: 안정성 확인을 위한 파일 접근 권한 거부: {file_path}")
-        return False
     except Exception as e:
         logging.error(f"파일 안정성 확인 중 오류 발생: {file_path} - {e}")
+    return None
+
+def has_png_iend_trailer(file_path):
+    """PNG 파일의 마지막 12바이트가 IEND 청크인지 확인합니다.
+
+    파일 끝에서 12바이트만 읽어 길이(0), 청크 타입('IEND'), CRC가 모두 있는지 확인합니다.
+    카메라는 파일을 한 번에 끝까지 쓰므로, IEND 청크가 있으면 파일이 완전히 쓰여진 것으로 판단할 수 있습니다.
+    파일이 12바이트보다 작거나 읽기 오류가 발생하면 False를 반환합니다.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            f.seek(-len(PNG_IEND_TRAILER), os.SEEK_END)
+            return f.read(len(PNG_IEND_TRAILER)) == PNG_IEND_TRAILER
+    except OSError:
         return False
 
-def find_and_process_png_files(config, base_name, target_date_str=None):
+def filter_stable_files(file_paths, wait_time=1, initial_stats=None):
+    """여러 파일의 안정성을 한 번의 대기로 일괄 확인합니다.
+
+    모든 후보 파일의 크기와 최종 수정 시간을 한 번에 기록한 후, 지정된 시간(기본값 1초) 동안 한 번만 기다립니다.
+    기다린 후 모든 파일을 다시 확인하여 크기와 수정 시간이 변하지 않았고 크기가 0보다 큰 파일만 반환합니다.
+    후보 파일 수와 관계없이 대기 시간은 한 번(O(1))입니다.
+    스캔에서 이미 얻은 {파일 경로: (크기, 최종 수정 시간)}을 `initial_stats`로 주면 처음 확인을 생략합니다.
+    """
+    if initial_stats is None:
+        initial_stats = {}
+        for file_path in file_paths:
+            stat_info = get_file_size_and_mtime(file_path)
+            if stat_info is not None:
+                initial_stats[file_path] = stat_info
+
+    if not initial_stats:
+        return []
+
+    time.sleep(wait_time)
+
+    stable_files = []
+    for file_path, initial_stat in initial_stats.items():
+        current_stat = get_file_size_and_mtime(file_path)
+        if current_stat is not None and current_stat == initial_stat and current_stat[0] > 0:
+            stable_files.append(file_path)
+    return stable_files
+
+class PNGEventHandler(FileSystemEventHandler):
+    """PNG 파일 생성/수정/이동 이벤트를 모아 두는 watchdog 이벤트 핸들러입니다.
+
+    이벤트가 발생한 PNG 파일 경로를 전역 변수 `event_paths`에 추가하고 `event_signal`로 스캔 루프를 깨웁니다.
+    실제 규칙 확인, 안정성 확인, 변환은 스캔 루프의 파이프라인에서 수행합니다.
+    """
+    def add_path(self, file_path):
+        if file_path.lower().endswith(".png"):
+            with event_paths_lock:
+                event_paths.add(os.path.normpath(file_path))
+            event_signal.set()
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.add_path(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.add_path(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.add_path(event.dest_path)
+
+def get_mount_fs_type(folder_path):
+    """Linux 마운트 목록(`PROC_MOUNTS_FILE`)에서 폴더를 포함하는 가장 긴 마운트 지점의 파일 시스템 종류를 반환합니다.
+
+    마운트 목록을 읽을 수 없으면(Linux가 아닌 경우 등) None을 반환합니다.
+    """
+    real_path = os.path.realpath(folder_path)
+    best_mount_point, fs_type = "", None
+    try:
+        with open(PROC_MOUNTS_FILE, 'r', encoding='utf-8') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                mount_point = fields[1].replace('\\040', ' ')
+                if (real_path == mount_point or real_path.startswith(mount_point.rstrip('/') + '/')) and \
+                   len(mount_point) > len(best_mount_point):
+                    best_mount_point, fs_type = mount_point, fields[2]
+    except OSError:
+        return None
+    return fs_type
+
+def is_local_folder(folder_path):
+    """폴더가 로컬 파일 시스템에 있는지 확인합니다.
+
+    Samba 공유 폴더 등 네트워크 폴더에서는 파일 시스템 이벤트와 SQLite 파일 잠금을 신뢰할 수 없으므로 False를 반환합니다.
+    - UNC 경로('\\\\서버\\공유')
+    - Windows: 네트워크 드라이브로 연결된 드라이브 문자 (`GetDriveTypeW`가 `DRIVE_REMOTE`)
+    - Linux: CIFS/NFS 등 `REMOTE_FS_TYPES` 종류로 마운트된 폴더 (`get_mount_fs_type` 함수로 확인)
+    원격 여부를 확인할 수 없으면 True를 반환합니다.
+    """
+    if folder_path.startswith(('\\\\', '//')):
+        return False
+    if os.name == 'nt':
+        drive = os.path.splitdrive(os.path.abspath(folder_path))[0]
+        if drive.startswith(('\\\\', '//')):
+            return False
+        return not drive or ctypes.windll.kernel32.GetDriveTypeW(drive + '\\') != DRIVE_REMOTE
+    return get_mount_fs_type(folder_path) not in REMOTE_FS_TYPES
+
+def start_event_source(config, base_name):
+    """설정에 따라 Base 폴더의 파일 시스템 이벤트 감지를 시작합니다.
+
+    설정 파일 [Events] event_source 값이 'watchdog'이고, watchdog가 설치되어 있으며,
+    Base 폴더가 로컬 파일 시스템에 있을 때만 감지를 시작하고 True를 반환합니다.
+    그 외에는 주기적 스캔만 사용하도록 False를 반환합니다.
+    """
+    global event_observer
+    if config.get('Events', 'event_source', fallback=DEFAULT_EVENT_SOURCE) != "watchdog":
+        return False
+    base_folder = dict(config.items('BaseFolders')).get(base_name)
+    if Observer is None:
+        print(f"[{base_name}] watchdog가 설치되어 있지 않아 주기적 스캔만 사용합니다.")
+        return False
+    if base_folder is None or not os.path.isdir(base_folder) or not is_local_folder(base_folder):
+        print(f"[{base_name}] 로컬 폴더가 아니므로 이벤트 감지 없이 주기적 스캔만 사용합니다: {base_folder}")
+        return False
+    try:
+        event_observer = Observer()
+        event_observer.schedule(PNGEventHandler(), base_folder, recursive=True)
+        event_observer.start()
+        print(f"[{base_name}] 파일 시스템 이벤트 감지 시작: {base_folder}")
+        return True
+    except Exception as e:
+        logging.error(f"파일 시스템 이벤트 감지 시작 중 오류 발생: {base_folder} - {e}")
+        event_observer = None
+        return False
+
+def stop_event_source():
+    """파일 시스템 이벤트 감지를 중지합니다."""
+    global event_observer
+    if event_observer is None:
+        return
+    event_observer.stop()
+    event_observer.join()
+    event_observer = None
+
+def drain_event_paths():
+    """마지막 호출 이후 이벤트로 감지된 PNG 파일 경로 목록을 꺼내고 비웁니다."""
+    global event_paths
+    with event_paths_lock:
+        drained_paths = event_paths
+        event_paths = set()
+    event_signal.clear()
+    return drained_paths
+
+def update_pending_file(file_path, size, modified_time, stable_scan_count, min_interval=SCAN_INTERVAL):
+    """스캔 간 크기와 수정 시간을 비교하여 파일이 안정되었는지 대기 없이 확인합니다.
+
+    전역 변수 `pending_files`에 이전 스캔에서 본 (크기, 최종 수정 시간)과 관찰 시각을 보관하고, 같은 값이 연속으로 관찰된 횟수를 셉니다.
+    이벤트 스캔처럼 스캔이 몇 ms 간격으로 이어져도 안정성 확인이 짧아지지 않도록,
+    마지막 관찰 후 `min_interval`초([Scan] min_interval_sec) 이상 지난 관찰만 다시 셉니다.
+    연속 `stable_scan_count`회 동일하고 크기가 0보다 크면 대기 목록에서 제거하고 True를 반환합니다.
+    """
+    now = time.time()
+    previous = pending_files.get(file_path)
+    if previous is not None and previous[0] == size and previous[1] == modified_time:
+        if now - previous[3] < min_interval:
+            return False
+        seen_count = previous[2] + 1
+    else:
+        seen_count = 1
+
+    if seen_count >= stable_scan_count and size > 0:
+        pending_files.pop(file_path, None)
+        return True
+    pending_files[file_path] = (size, modified_time, seen_count, now)
+    return False
+
+def prune_pending_files(seen_paths, day_bounds):
+    """이번 스캔에서 보이지 않은 파일(삭제되었거나 이미 처리된 파일)을 대기 목록에서 제거합니다.
+
+    날짜가 바뀐 직후에는 이전 날짜와 오늘 날짜를 번갈아 스캔하므로, 이번 스캔 날짜(`day_bounds` 범위)의 파일만 정리합니다.
+    """
+    global pending_files
+    day_start, day_end = day_bounds
+    pending_files = {file_path: pending for file_path, pending in pending_files.items()
+                     if file_path in seen_paths or not day_start <= pending[1] < day_end}
+
+def enumerate_stage(upstream, context):
+    """파이프라인 1단계 (열거): 대상 연월 말단 폴더의 PNG 파일을 `PngCandidate`로 내보냅니다."""
+    yield from iter_target_png_files(context['watch_folder'], context['target_date'],
+                                     context['use_dir_cache'], context['dir_cache_max_age'], context['list_workers'])
+
+def event_enumerate_stage(upstream, context):
+    """파이프라인 1단계 (이벤트 열거): 폴더를 나열하지 않고, 이벤트로 감지된 파일과 안정성 확인 대기 중인 파일만 내보냅니다.
+
+    이벤트 경로 중 대상 연월 말단 폴더에 있는 파일만 내보내며,
+    대기 중인 파일은 이벤트가 더 오지 않아도 다음 스캔에서 안정성을 다시 확인할 수 있도록 함께 내보냅니다.
+    """
+    leaf_folders = {os.path.normpath(leaf_folder): relative_folder
+                    for leaf_folder, relative_folder in get_target_leaf_folders(context['watch_folder'],
+                                                                                context['target_date'])}
+    for png_path in set(context['event_paths']) | set(pending_files):
+        relative_folder = leaf_folders.get(os.path.dirname(os.path.normpath(png_path)))
+        if relative_folder is not None:
+            candidate = stat_png_candidate(png_path, os.path.join(relative_folder, os.path.basename(png_path)))
+            if candidate is not None:
+                yield candidate
+
+def filter_stage(candidates, context):
+    """파이프라인 2단계 (규칙 필터): 처리 대상 날짜의 새로운 또는 수정된 PNG 파일만 내보냅니다.
+
+    파일의 최종 수정 시간이 처리 대상 날짜 범위에 있고, 처리된 파일 목록에 없거나 수정 시간이 다른 파일만 내보냅니다.
+    변환 실패로 재시도 대기 중이거나 격리된 파일은 `is_conversion_deferred` 함수로 확인하여 건너뜁니다.
+    열거 단계에서 가져온 stat 결과를 사용하므로 파일 정보를 다시 가져오지 않습니다.
+    발견 파일 수(`context['found_count']`)에는 새 파일과 안정성 확인 대기 중 크기/수정 시간이 바뀐 파일만 셉니다
+    (크기 0으로 남은 파일처럼 바뀌지 않고 대기 중인 파일이 스캔 간격을 계속 최소로 붙잡지 않도록).
+    """
+    day_start, day_end = context['day_bounds']
+    for candidate in candidates:
+        png_path = candidate.path
+        if not day_start <= candidate.mtime < day_end:
+            continue
+        if processed_files.get(png_path) == candidate.mtime:
+            continue
+        if is_conversion_deferred(png_path, candidate.mtime):
+            continue
+        pending = pending_files.get(png_path)
+        if pending is None:
+            print(f"[{context['base_folder_name']}] 새로운 또는 수정된 PNG 발견 (날짜 일치): {png_path}")
+        if pending is None or pending[:2] != (candidate.size, candidate.mtime):
+            context['found_count'] += 1
+        yield candidate
+
+def skip_identical_stage(candidates, context):
+    """파이프라인 3단계 (이미 변환된 파일 건너뛰기): 출력 폴더에 같은 원본으로 만든 JPG가 이미 있는 파일은 변환하지 않습니다.
+
+    `context['skip_identical']`가 True이면 파일마다 출력 JPG의 수정 시간을 `is_output_up_to_date` 함수로 확인하여,
+    원본 PNG의 수정 시간과 같으면 읽기/디코딩/인코딩 없이 처리 이력에만 기록합니다.
+    비정상 종료로 처리 이력에 반영되지 못한 파일이나 처리 이력 없이 날짜를 다시 처리할 때 이미 변환된 파일의 비용을 줄입니다.
+    새 파일마다 출력 폴더의 stat이 한 번 늘어나므로, [Processing] skip_identical_output이 true이고
+    시작 후 또는 백필에서 그 날짜를 처음 스캔할 때만 확인합니다 (`find_and_process_png_files` 참고).
+    안정성 확인 단계보다 앞에서 확인하므로, 첫 스캔에서 아직 안정되지 않은 것으로 판단될 파일도 이 스캔에서 건너뜁니다
+    (출력 JPG의 수정 시간이 원본과 같으면 이미 그 내용으로 변환을 마친 파일).
+    """
+    if not context['skip_identical']:
+        yield from candidates
+        return
+    for candidate in candidates:
+        output_path = get_jpg_output_path(candidate.path, context['output_base_folder'], context['watch_folder'],
+                                          candidate.relative_path)
+        if is_output_up_to_date(output_path, candidate.mtime):
+            print(f"[{context['base_folder_name']}] 이미 변환된 JPG가 있어 건너뜀: {candidate.path}")
+            failed_files.pop(candidate.path, None)
+            record_processed_file(candidate.path, candidate.mtime, output_path, candidate.size)
+        else:
+            yield candidate
+
+def stability_stage(candidates, context):
+    """파이프라인 4단계 (안정성 확인): 완전히 쓰여진 PNG 파일만 내보냅니다.
+
+    [Scan] check_png_trailer가 true이면 먼저 `has_png_iend_trailer` 함수로 PNG 끝의 IEND 청크를 확인하여
+    완전히 쓰여진 파일은 바로 내보내고, 확인되지 않은 파일만 [Scan] stability_mode 방식으로 확인합니다.
+    'scan'(기본값)이면 `update_pending_file` 함수로 [Scan] min_interval_sec 이상 떨어진 스캔 간 크기/수정 시간을 비교하여 대기 없이 확인하고,
+    'batch'이면 후보를 모두 모은 후 `filter_stable_files` 함수로 한 번 대기한 후 일괄 확인합니다.
+    """
+    batch_candidates = {}
+    seen_paths = set()
+    for candidate in candidates:
+        png_path = candidate.path
+        if context['check_png_trailer'] and candidate.size >= len(PNG_IEND_TRAILER) and \
+           has_png_iend_trailer(png_path):
+            yield candidate
+        elif context['stability_mode'] == "batch":
+            batch_candidates[png_path] = candidate
+        else:
+            seen_paths.add(png_path)
+            if update_pending_file(png_path, candidate.size, candidate.mtime, context['stable_scan_count'],
+                                   context['stable_min_interval']):
+                yield candidate
+
+    if context['stability_mode'] == "batch":
+        initial_stats = {png_path: (candidate.size, candidate.mtime)
+                         for png_path, candidate in batch_candidates.items()}
+        stable_paths = set(filter_stable_files(batch_candidates, initial_stats=initial_stats))
+        for png_path, candidate in batch_candidates.items():
+            if png_path in stable_paths:
+                yield candidate
+            else:
+                print(f"[{context['base_folder_name']}] PNG 파일이 아직 안정되지 않음: {png_path}")
+    elif context['event_paths'] is None:
+        # 전체 스캔에서만 대기 목록을 정리 (이벤트 스캔은 일부 파일만 보므로 정리하지 않음)
+        prune_pending_files(seen_paths, context['day_bounds'])
+
+def collect_convert_results(done_futures, in_flight, context):
+    """완료된 변환 작업의 결과를 꺼내 내보냅니다.
+
+    작업이 미리 읽은 파일 내용을 사용했으면 그 크기를 `context['prefetch_bytes']`에서 뺍니다.
+    작업 실행 중 예외가 발생하면 로깅하고, 작업자 풀이 비정상 종료되면 다음 스캔에서 다시 만들도록 정리합니다.
+    """
+    for future in done_futures:
+        png_path, prefetched_bytes = in_flight.pop(future)
+        context['prefetch_bytes'] -= prefetched_bytes
+        try:
+            yield future.result()
+        except BrokenProcessPool as e:
+            logging.error(f"변환 작업자 풀 비정상 종료: {png_path} - {e}")
+            shutdown_convert_executor()
+        except Exception as e:
+            logging.error(f"변환 작업 실행 중 오류 발생: {png_path} - {e}")
+
+def get_prefetch_executor(prefetch_count):
+    """PNG 파일 미리 읽기용 스레드 풀을 처음 호출할 때 한 번 만들어 재사용합니다."""
+    global prefetch_executor
+    if prefetch_executor is None:
+        prefetch_executor = ThreadPoolExecutor(max_workers=prefetch_count, thread_name_prefix="prefetch")
+    return prefetch_executor
+
+def shutdown_prefetch_executor():
+    """PNG 파일 미리 읽기용 스레드 풀이 있으면 종료합니다."""
+    global prefetch_executor
+    if prefetch_executor is None:
+        return
+    prefetch_executor.shutdown(wait=True)
+    prefetch_executor = None
+
+def get_prefetch_limits(config):
+    """미리 읽기 한도 ([Processing] prefetch_count 파일 수, [Processing] prefetch_max_mb를 바이트로 바꾼 값)를 반환합니다."""
+    prefetch_count = config.getint('Processing', 'prefetch_count', fallback=DEFAULT_PREFETCH_COUNT)
+    max_bytes = config.getfloat('Processing', 'prefetch_max_mb', fallback=DEFAULT_PREFETCH_MAX_MB) * 1024 * 1024
+    return prefetch_count, max_bytes
+
+def prefetch_stage(candidates, context):
+    """변환 앞 단계 (미리 읽기): 다음에 변환할 PNG 파일들을 미리 메모리로 읽어 두고 순서대로 내보냅니다.
+
+    앞쪽 파일을 변환(디코딩/인코딩)하는 동안 다음 파일들을 스레드 풀에서 `read_png_bytes` 함수로 읽어
+    `candidate.data`에 넣어 두므로, 네트워크 공유 폴더의 읽기 대기 시간이 CPU 작업과 겹칩니다.
+    미리 읽는 파일은 최대 [Processing] prefetch_count개입니다. 미리 읽은 내용의 크기는 변환이 끝날 때까지
+    `context['prefetch_bytes']`에 합산되므로 (변환 단계가 완료 시 뺌), 변환 중인 파일의 내용도 포함하여
+    최대 [Processing] prefetch_max_mb까지만 읽습니다 (미리 읽은 파일이 없으면 한도를 넘어도 한 개는 읽음).
+    변환 단계가 파일을 가져가야 다음 파일을 읽기 시작합니다. prefetch_count가 0이면 미리 읽지 않고 그대로 내보냅니다.
+    """
+    prefetch_count, max_bytes = get_prefetch_limits(context['config'])
+    if prefetch_count <= 0:
+        yield from candidates
+        return
+    executor = get_prefetch_executor(prefetch_count)
+    window = deque()
+
+    def pop_prefetched():
+        candidate, future = window.popleft()
+        candidate.data = future.result()
+        if candidate.data is None:  # 읽기 실패 (변환 작업에서 다시 읽음)
+            context['prefetch_bytes'] -= candidate.size
+        return candidate
+
+    for candidate in candidates:
+        while window and (len(window) >= prefetch_count or
+                          context['prefetch_bytes'] + candidate.size > max_bytes):
+            yield pop_prefetched()
+        window.append((candidate, executor.submit(read_png_bytes, candidate.path)))
+        context['prefetch_bytes'] += candidate.size
+    while window:
+        yield pop_prefetched()
+
+def convert_stage(stable_files, context):
+    """파이프라인 5단계 (변환): 안정된 PNG 파일을 설정된 변환 방식으로 변환하고 결과를 내보냅니다.
+
+    작업자 풀이 없으면 현재 스레드에서 순서대로 변환합니다.
+    작업자 풀이 있으면 파일이 도착하는 대로 제출하고 완료된 결과를 내보내며,
+    동시에 진행 중인 작업 수를 작업자 수의 2배로 제한하여 상위 단계에 역압을 전달합니다.
+    스레드 풀 작업자는 변환 후 공유된 `processed_files`에 직접 기록합니다 (스테이징 폴더를 사용하면 기록 단계에서 기록).
+    [Paths] staging_folder를 사용하면 JPG를 출력 폴더 대신 로컬 스테이징 폴더에 저장합니다.
+    입력은 `prefetch_stage`를 큐 없이 바로 거칩니다. 미리 읽은 내용은 변환이 끝날 때까지
+    [Processing] prefetch_max_mb 한도에 포함하며, 한도를 넘으면 진행 중인 변환이 끝나기를 기다린 후 다음 파일을 가져옵니다.
+    프로세스 풀에서는 미리 읽은 내용이 작업자 프로세스로 전달(pickle)되므로 미리 읽지 않고, 작업자가 파일을 직접 읽습니다.
+    """
+    config = context['config']
+    executor = get_convert_executor(config, context['base_folder_name'])
+    _, max_prefetch_bytes = get_prefetch_limits(config)
+    context['prefetch_bytes'] = 0
+    if not isinstance(executor, ProcessPoolExecutor):
+        stable_files = prefetch_stage(stable_files, context)
+    task_args = (context['staging_folder'] or context['output_base_folder'], context['watch_folder'],
+                 context['jpg_quality'], config.get('Processing', 'read_mode', fallback=DEFAULT_READ_MODE),
+                 context['encoder'], config.get('Ledger', 'backend', fallback=DEFAULT_LEDGER_BACKEND) == "sqlite")
+    if executor is None:
+        for candidate in stable_files:
+            prefetched_bytes = candidate.size if candidate.data is not None else 0
+            result = convert_png_task(candidate, *task_args)
+            context['prefetch_bytes'] -= prefetched_bytes
+            yield result
+        return
+
+    if isinstance(executor, ThreadPoolExecutor) and not context['staging_folder']:
+        task = convert_and_record_png_task
+    else:
+        task = convert_png_task
+    max_in_flight = config.getint('Processing', 'num_workers', fallback=DEFAULT_NUM_WORKERS) * 2
+    in_flight = {}
+    for candidate in stable_files:
+        prefetched_bytes = candidate.size if candidate.data is not None else 0
+        in_flight[executor.submit(task, candidate, *task_args)] = (candidate.path, prefetched_bytes)
+        while in_flight and (len(in_flight) >= max_in_flight or context['prefetch_bytes'] > max_prefetch_bytes):
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            yield from collect_convert_results(done, in_flight, context)
+    while in_flight:
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        yield from collect_convert_results(done, in_flight, context)
+
+def move_staged_file(staged_path, final_path):
+    """스테이징 폴더의 JPG 파일을 출력 폴더의 최종 경로로 원자적으로 옮깁니다.
+
+    같은 드라이브이면 `os.replace` 한 번으로 옮기고, 다른 드라이브(네트워크 공유 폴더 등)이면
+    최종 경로 옆의 임시 파일(.temp)로 복사한 후 `os.replace`로 교체하고 스테이징 파일을 삭제합니다.
+    어느 경우든 출력 폴더에는 완전한 JPG 파일만 나타납니다.
+    """
+    try:
+        os.replace(staged_path, final_path)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        temp_path = f"{final_path}.temp"
+        shutil.copy2(staged_path, temp_path)  # 수정 시간(원본 PNG 수정 시간)도 함께 복사
+        os.replace(temp_path, final_path)
+        os.remove(staged_path)
+
+def write_behind_worker(batch_size):
+    """쓰기 지연 스레드: `write_behind_queue`의 스테이징 JPG를 출력 폴더로 옮기고 처리 이력에 기록합니다.
+
+    대기 중인 파일을 최대 `batch_size`개씩 한 번에 꺼내 옮기며, 이미 만든 출력 폴더는 기억하여 다시 만들지 않습니다
+    (옮기는 중 FileNotFoundError가 발생하면 삭제된 폴더일 수 있으므로 다시 만든 후 한 번 더 옮김).
+    처리 이력은 파일을 옮긴 후에 최종 경로로 기록하므로, 옮기지 못한 파일은 다음 스캔에서 다시 변환됩니다.
+    옮기는 중 오류가 발생하면 로깅합니다. None을 꺼내면 남은 파일을 처리한 후 종료합니다.
+    """
+    created_folders = set()
+    while True:
+        items = [write_behind_queue.get()]
+        while len(items) < batch_size:
+            try:
+                items.append(write_behind_queue.get_nowait())
+            except queue.Empty:
+                break
+        stop = False
+        for item in items:
+            if item is None:
+                stop = True
+            else:
+                staged_path, final_path, result = item
+                try:
+                    final_folder = os.path.dirname(final_path)
+                    if final_folder not in created_folders:
+                        os.makedirs(final_folder, exist_ok=True)
+                        created_folders.add(final_folder)
+                    try:
+                        move_staged_file(staged_path, final_path)
+                    except FileNotFoundError:
+                        if not os.path.exists(staged_path):
+                            raise
+                        created_folders.discard(final_folder)
+                        os.makedirs(final_folder, exist_ok=True)
+                        created_folders.add(final_folder)
+                        move_staged_file(staged_path, final_path)
+                    candidate, _, duration, content_hash, _ = result
+                    record_convert_result((candidate, final_path, duration, content_hash, None))
+                except Exception as e:
+                    logging.error(f"스테이징 파일 이동 중 오류 발생: {staged_path} → {final_path} - {e}")
+            write_behind_queue.task_done()
+        if stop:
+            return
+
+def enqueue_write_behind(staged_path, result, context):
+    """스테이징 폴더에 저장된 JPG를 출력 폴더로 옮기도록 쓰기 지연 스레드에 넘깁니다 (스레드는 처음 호출할 때 시작)."""
+    global write_behind_thread
+    if write_behind_thread is None:
+        batch_size = context['config'].getint('Processing', 'write_behind_batch', fallback=DEFAULT_WRITE_BEHIND_BATCH)
+        write_behind_thread = threading.Thread(target=write_behind_worker, args=(max(batch_size, 1),),
+                                               name="write_behind", daemon=True)
+        write_behind_thread.start()
+    final_path = os.path.join(context['output_base_folder'],
+                              os.path.relpath(staged_path, context['staging_folder']))
+    write_behind_queue.put((staged_path, final_path, result))
+
+def flush_write_behind():
+    """쓰기 지연 스레드에 넘긴 JPG를 모두 옮기고 처리 이력에 기록할 때까지 기다립니다."""
+    if write_behind_thread is not None:
+        write_behind_queue.join()
+
+def shutdown_write_behind():
+    """남은 스테이징 JPG를 모두 옮긴 후 쓰기 지연 스레드를 종료합니다."""
+    global write_behind_thread
+    if write_behind_thread is None:
+        return
+    write_behind_queue.put(None)
+    write_behind_thread.join()
+    write_behind_thread = None
+
+def record_stage(results, context):
+    """파이프라인 6단계 (기록): 변환에 성공한 파일을 처리 이력에 기록하고 파일 경로를 내보냅니다.
+
+    스레드 풀 작업자가 이미 기록한 결과는 다시 기록하지 않습니다.
+    [Paths] staging_folder를 사용하면 변환 결과는 스테이징 폴더에 있으므로, `enqueue_write_behind` 함수로
+    쓰기 지연 스레드에 넘겨 출력 폴더로 옮긴 후 기록합니다 (변환은 출력 폴더의 네트워크 지연을 기다리지 않음).
+    변환에 실패한 파일은 `record_convert_failure` 함수로 실패 종류와 함께 재시도 대기 또는 격리 목록에 기록합니다.
+    """
+    for result in results:
+        candidate, output_path = result[:2]
+        if output_path:
+            failed_files.pop(candidate.path, None)
+            if context['staging_folder']:
+                enqueue_write_behind(output_path, result, context)
+            elif processed_files.get(candidate.path) != candidate.mtime:
+                record_convert_result(result)
+            yield candidate.path
+        else:
+            record_convert_failure(candidate.path, candidate.mtime, context, result[4])
+
+DEFAULT_PIPELINE_STAGES = [enumerate_stage, filter_stage, skip_identical_stage, stability_stage, convert_stage,
+                           record_stage]  # 스캔 파이프라인 기본 단계
+
+def run_stage_in_thread(stage_items, queue_depth):
+    """파이프라인 단계를 별도 스레드에서 실행하고, 크기가 제한된 큐를 통해 결과를 내보냅니다.
+
+    단계가 내보내는 항목을 최대 `queue_depth`개까지 큐에 쌓으며, 큐가 가득 차면 단계 실행이 멈춰
+    하위 단계의 처리 속도에 맞춰집니다 (역압). 이를 통해 열거가 끝나기 전에 첫 파일의 변환을 시작할 수 있습니다.
+    단계 실행 중 예외가 발생하면 로깅하고 해당 단계의 출력을 종료합니다.
+    하위 단계가 중간에 순회를 멈추면 단계 스레드도 중지합니다.
+    """
+    item_queue = queue.Queue(maxsize=queue_depth)
+    stop_event = threading.Event()
+    end_marker = object()
+
+    def put(item):
+        while not stop_event.is_set():
+            try:
+                item_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in stage_items:
+                if not put(item):
+                    break
+        except Exception as e:
+            logging.error(f"파이프라인 단계 실행 중 오류 발생: {e}")
+        finally:
+            if hasattr(stage_items, 'close'):
+                stage_items.close()
+            put(end_marker)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = item_queue.get()
+            if item is end_marker:
+                break
+            yield item
+    finally:
+        stop_event.set()
+        producer.join()
+
+def load_priority_config(config):
+    """설정 파일 [Priority] 섹션에서 변환 우선순위 설정을 읽습니다.
+
+    판정 결과 폴더(category_order)와 카메라 폴더(camera_order)를 쉼표로 구분한 순서대로 (폴더 이름: 순위) 딕셔너리로 반환하며,
+    목록에 없는 폴더는 가장 낮은 우선순위입니다. [Priority] enabled가 false이면 모든 폴더가 같은 우선순위입니다.
+    [Priority] oldest_first가 true이면 같은 우선순위 안에서 최종 수정 시간이 오래된 파일부터 변환합니다.
+    두 설정이 모두 false이면 우선순위 큐를 사용하지 않도록 None을 반환합니다.
+    """
+    enabled = config.getboolean('Priority', 'enabled', fallback=True)
+    oldest_first = config.getboolean('Priority', 'oldest_first', fallback=True)
+    if not enabled and not oldest_first:
+        return None
+
+    def parse_order(option, fallback):
+        if not enabled:
+            return {}
+        names = [name.strip().upper() for name in config.get('Priority', option, fallback=fallback).split(',')]
+        return {name: rank for rank, name in enumerate(name for name in names if name)}
+
+    return {
+        'category_rank': parse_order('category_order', DEFAULT_PRIORITY_CATEGORY_ORDER),
+        'camera_rank': parse_order('camera_order', ""),
+        'oldest_first': oldest_first,
+        'queue_depth': config.getint('Priority', 'queue_depth', fallback=DEFAULT_PRIORITY_QUEUE_DEPTH),
+    }
+
+def get_candidate_priority(candidate, priority_config):
+    """`PngCandidate`의 변환 우선순위를 (판정 결과 폴더 순위, 카메라 폴더 순위, 최종 수정 시간, 판정 결과 폴더 이름)으로
+    반환합니다 (작을수록 먼저, oldest_first가 아니면 최종 수정 시간은 0).
+
+    폴더 구조 규칙('{NG,OK,NG_OK}/YYYYMM/{LEFT,LINE,...}/파일명')에 따라 상대 경로에서 판정 결과와 카메라 폴더를 가져옵니다.
+    """
+    parts = candidate.relative_path.split(os.sep)
+    category = parts[0].upper()
+    camera = parts[2].upper() if len(parts) > 2 else ""
+    category_rank = priority_config['category_rank']
+    camera_rank = priority_config['camera_rank']
+    modified_time = candidate.mtime if priority_config['oldest_first'] else 0
+    return (category_rank.get(category, len(category_rank)), camera_rank.get(camera, len(camera_rank)), modified_time,
+            category)
+
+def run_priority_stage_in_thread(stage_items, context):
+    """파이프라인 단계를 별도 스레드에서 실행하고, 우선순위 큐를 통해 우선순위가 높은 결과부터 내보냅니다.
+
+    `run_stage_in_thread`와 같지만 큐가 `queue.PriorityQueue`이므로, 변환이 밀려 큐에 파일이 쌓이면
+    `get_candidate_priority` 순위가 높은 파일(기본값: NG → NG_OK → OK)이 먼저 쌓인 파일보다 앞서 변환되고,
+    같은 순위 안에서는 최종 수정 시간이 오래된 파일부터 변환되어 밀린 파일이 계속 뒤로 밀리지 않습니다.
+    `queue.PriorityQueue`는 힙이므로 전체 후보를 모아 정렬하지 않고 도착하는 대로 넣고 꺼내며,
+    순위와 수정 시간이 모두 같으면 들어온 순서대로 내보냅니다. 큐의 최대 항목 수는 [Priority] queue_depth입니다.
+    판정 결과 폴더별 최대 대기 수, 처리 수, 대기 시간 합계는 `context['queue_stats']`에 기록합니다.
+    """
+    priority_config = context['priority']
+    queue_stats = context['queue_stats']
+    item_queue = queue.PriorityQueue(maxsize=priority_config['queue_depth'])
+    stop_event = threading.Event()
+    end_entry = (1,)  # 모든 항목 (0, ...) 뒤에 정렬되는 종료 표시
+    queued_counts = {}
+    counts_lock = threading.Lock()
+
+    def put(entry):
+        while not stop_event.is_set():
+            try:
+                item_queue.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        sequence = 0
+        try:
+            for item in stage_items:
+                priority = get_candidate_priority(item, priority_config)
+                with counts_lock:
+                    depth = queued_counts.get(priority[-1], 0) + 1
+                    queued_counts[priority[-1]] = depth
+                    stats = queue_stats.setdefault(priority[-1], [0, 0, 0.0])
+                    stats[0] = max(stats[0], depth)
+                sequence += 1
+                if not put((0, priority, sequence, time.perf_counter(), item)):
+                    break
+        except Exception as e:
+            logging.error(f"파이프라인 단계 실행 중 오류 발생: {e}")
+        finally:
+            if hasattr(stage_items, 'close'):
+                stage_items.close()
+            put(end_entry)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            entry = item_queue.get()
+            if entry is end_entry:
+                break
+            _, priority, _, queued_time, item = entry
+            with counts_lock:
+                queued_counts[priority[-1]] -= 1
+                stats = queue_stats[priority[-1]]
+                stats[1] += 1
+                stats[2] += time.perf_counter() - queued_time
+            yield item
+    finally:
+        stop_event.set()
+        producer.join()
+
+def format_priority_queue_stats(queue_stats):
+    """우선순위 큐 통계를 '판정 결과 폴더 처리 수/최대 대기 수/평균 대기 시간' 형식의 문자열로 만듭니다."""
+    return ", ".join(f"{category} {count}개/최대 대기 {max_depth}개/평균 {total_wait / count:.2f}초"
+                     for category, (max_depth, count, total_wait) in sorted(queue_stats.items()) if count)
+
+def merge_priority_queue_stats(queue_stats):
+    """스캔 한 번의 우선순위 큐 통계를 지표 기록용 전역 변수 `priority_queue_stats`에 합칩니다."""
+    for category, (max_depth, count, total_wait) in queue_stats.items():
+        stats = priority_queue_stats.setdefault(category, [0, 0, 0.0])
+        stats[0] = max(stats[0], max_depth)
+        stats[1] += count
+        stats[2] += total_wait
+
+def run_scan_pipeline(context, stages=None):
+    """스캔 파이프라인을 실행하고 처리 이력에 기록된 파일 수를 반환합니다.
+
+    각 단계는 `stage(상위 단계 출력, context)` 형태의 제너레이터 함수이며, `stages`로 단계를 개별적으로 교체할 수 있습니다
+    (기본값: 열거 → 규칙 필터 → 이미 변환된 파일 건너뛰기 → 안정성 확인 → 변환 → 기록).
+    마지막 단계를 제외한 각 단계는 `run_stage_in_thread` 함수로 별도 스레드에서 실행되고,
+    [Processing] pipeline_queue_depth 크기의 큐로 연결됩니다.
+    변환 단계 바로 앞의 큐는 [Priority] enabled 또는 oldest_first이면 `run_priority_stage_in_thread` 함수의 우선순위 큐를 사용합니다.
+    """
+    stages = stages or DEFAULT_PIPELINE_STAGES
+    queue_depth = context['config'].getint('Processing', 'pipeline_queue_depth',
+                                           fallback=DEFAULT_PIPELINE_QUEUE_DEPTH)
+    items = None
+    for index, stage in enumerate(stages[:-1]):
+        if context.get('priority') is not None and stages[index + 1] is convert_stage:
+            items = run_priority_stage_in_thread(stage(items, context), context)
+        else:
+            items = run_stage_in_thread(stage(items, context), queue_depth)
+    recorded_count = 0
+    for _ in stages[-1](items, context):
+        recorded_count += 1
+    return recorded_count
+
+def find_and_process_png_files(config, base_name, target_date_str=None, png_paths=None):
     """주어진 Base 폴더에서 PNG 파일을 찾아 변환합니다.
 
     설정 파일, Base 폴더 이름, 그리고 처리할 특정 날짜 문자열을 인자로 받습니다.
+    `png_paths`(이벤트로 감지된 파일 경로 목록)가 주어지면 폴더를 나열하지 않고
+    `event_enumerate_stage` 단계로 해당 파일과 안정성 확인 대기 중인 파일만 확인합니다.
     설정 파일에서 Base 폴더 경로, 출력 기본 폴더, JPG 품질 설정을 읽어옵니다.
     주어진 Base 폴더 이름이 설정 파일에 없으면 오류 메시지를 출력하고 함수를 종료합니다.
     처리할 날짜 문자열이 주어지지 않으면 현재 날짜를 사용합니다.
-    `load_processed_files_from_file` 함수를 호출하여 이미 처리된 파일 목록을 로드합니다.
-    `os.walk` 함수를 사용하여 Base 폴더 아래의 모든 PNG 파일을 검색합니다.
-    검색된 각 PNG 파일의 경로를 확인하여 특정 폴더 구조 규칙을 따르는지 검사합니다.
-    파일의 최종 수정 날짜가 처리 대상 날짜와 일치하는지 확인합니다.
-    이미 처리된 파일이 아니거나 수정된 파일인 경우, `is_file_stable` 함수를 호출하여 파일 안정성을 확인한 후
-    `convert_png_to_jpg` 함수를 호출하여 JPG로 변환합니다.
-    변환 후에는 `save_processed_files_to_file` 함수를 호출하여 처리된 파일 목록을 업데이트합니다.
+    `open_ledger` 함수를 호출하여 이미 처리된 파일 목록을 로드합니다 (날짜별로 한 번만 읽음, 열지 못하면 스캔하지 않음).
+    `run_scan_pipeline` 함수로 열거 → 규칙 필터 → 이미 변환된 파일 건너뛰기 → 안정성 확인 → 변환 → 기록 단계를 큐로 연결하여 실행합니다.
+    - 열거: `iter_target_png_files` 함수로 폴더 구조 규칙에 맞는 대상 연월의 말단 폴더에서만 PNG 파일을 검색합니다.
+    - 규칙 필터: 파일의 최종 수정 날짜가 처리 대상 날짜와 일치하고, 처리되지 않았거나 수정된 파일만 남깁니다.
+    - 이미 변환된 파일 건너뛰기: [Processing] skip_identical_output이 true이면 복구가 필요한 경우인 날짜별 첫 스캔(시작 직후, 백필)에서
+      같은 원본으로 만든 JPG가 이미 있는 파일을 변환하지 않고 처리 이력에만 기록합니다.
+    - 안정성 확인: 설정 파일 [Scan] 섹션의 방식으로 완전히 쓰여진 파일만 남깁니다.
+      결과는 [Priority] 섹션의 우선순위(판정 결과, 카메라 폴더, 오래된 파일 먼저) 큐를 거쳐 변환 단계로 전달됩니다.
+    - 변환: 설정에 따라 순차, 프로세스 풀 또는 스레드 풀로 JPG 변환합니다.
+    - 기록: `record_processed_file` 함수로 처리 이력에 기록하고, 실패한 파일은 재시도 대기 또는 격리합니다.
+    스캔이 끝나면 스테이징 폴더의 JPG를 모두 옮길 때까지 기다린 후(`flush_write_behind`) `commit_ledger` 함수로 처리 이력을 한 번에 반영합니다.
+    이번 스캔에서 발견된 새로운 또는 수정된 PNG 파일 수를 반환합니다
+    (안정성 확인 대기 중 바뀌지 않은 파일은 세지 않음, 오류로 스캔하지 못하면 0).
     파일 정보 가져오기 중 오류가 발생하면 로깅합니다.
     """
     base_folders = dict(config.items('BaseFolders'))
     output_base_folder = config['Paths']['output_base_folder']
     jpg_quality = int(config['Image']['jpg_quality'])
+    stability_mode = config.get('Scan', 'stability_mode', fallback=DEFAULT_STABILITY_MODE)
+    stable_scan_count = config.getint('Scan', 'stable_scan_count', fallback=DEFAULT_STABLE_SCAN_COUNT)
+    check_png_trailer = config.getboolean('Scan', 'check_png_trailer', fallback=False)
 
     if base_name not in base_folders:
         print(f"오류: Base 폴더 이름 '{base_name}'이(가) config.ini [BaseFolders]에 없습니다.")
-        return
+        return 0
 
     base_folder = base_folders[base_name]
     base_folder_name = base_name.lower()
@@ -287,83 +1892,440 @@ def find_and_process_png_files(config, base_name, target_date_str=None):
     if target_date_str:
         if not re.match(r'^\d{8}$', target_date_str):
             print("오류: 날짜 형식이 잘못되었습니다. YYYYMMDD 형식으로 입력해주세요.")
-            return
+            return 0
         try:
             target_date = datetime.strptime(target_date_str, "%Y%m%d").date()
         except ValueError:
             print("오류: 유효하지 않은 날짜 형식입니다. YYYYMMDD 형식으로 입력해주세요.")
-            return
+            return 0
     else:
         target_date = datetime.now().date()
         target_date_str = target_date.strftime("%Y%m%d")
 
     watch_folder = base_folder
 
-    load_processed_files_from_file(output_base_folder, base_folder_name, target_date_str)
+    if not open_ledger(config, output_base_folder, base_folder_name, target_date_str):
+        print(f"[{base_folder_name}] 처리 이력을 열 수 없어 스캔을 건너뜁니다 (날짜: {target_date_str})")
+        return 0
+
+    if png_paths is None:
+        print(f"[{base_folder_name}] 폴더 스캔 시작: {watch_folder} (날짜: {target_date_str})")
+    context = {
+        'config': config,
+        'base_folder_name': base_folder_name,
+        'watch_folder': watch_folder,
+        'output_base_folder': output_base_folder,
+        'jpg_quality': jpg_quality,
+        'target_date': target_date,
+        'target_date_str': target_date_str,
+        'day_bounds': get_day_bounds(target_date),
+        'stability_mode': stability_mode,
+        'stable_scan_count': stable_scan_count,
+        'stable_min_interval': config.getfloat('Scan', 'min_interval_sec', fallback=SCAN_INTERVAL),
+        'check_png_trailer': check_png_trailer,
+        'retry_base_delay': config.getfloat('Retry', 'base_delay_sec', fallback=DEFAULT_RETRY_BASE_DELAY_SEC),
+        'retry_max_delay': config.getfloat('Retry', 'max_delay_sec', fallback=DEFAULT_RETRY_MAX_DELAY_SEC),
+        'retry_max_attempts': config.getint('Retry', 'max_attempts', fallback=DEFAULT_RETRY_MAX_ATTEMPTS),
+        'event_paths': png_paths,
+        'use_dir_cache': config.getboolean('Scan', 'dir_cache', fallback=False),
+        'dir_cache_max_age': config.getfloat('Scan', 'dir_cache_max_age_sec', fallback=DEFAULT_DIR_CACHE_MAX_AGE_SEC),
+        'list_workers': config.getint('Scan', 'list_workers', fallback=DEFAULT_LIST_WORKERS),
+        'found_count': 0,
+        'priority': load_priority_config(config),
+        'queue_stats': {},
+        'staging_folder': config.get('Paths', 'staging_folder', fallback=""),
+        'encoder': resolve_jpeg_encoder(config),
+        'skip_identical': config.getboolean('Processing', 'skip_identical_output', fallback=False) and
+                          (base_folder_name, target_date_str) not in output_checked_dates,
+    }
+    if png_paths is None:
+        run_scan_pipeline(context)
+    else:
+        run_scan_pipeline(context, [event_enumerate_stage] + DEFAULT_PIPELINE_STAGES[1:])
+    output_checked_dates.add((base_folder_name, target_date_str))
+
+    flush_write_behind()
+    commit_ledger()
+    if any(count for _, count, _ in context['queue_stats'].values()):
+        print(f"[{base_folder_name}] 변환 대기열: {format_priority_queue_stats(context['queue_stats'])}")
+        merge_priority_queue_stats(context['queue_stats'])
+    return context['found_count']
+
+def get_overlap_process_date(target_date_str, overlap_sec):
+    """날짜가 바뀐 후 겹침 시간 동안 함께 스캔할 이전 날짜를 반환합니다.
+
+    현재 시각이 처리 대상 날짜의 자정부터 `overlap_sec` 이내이면 전날 날짜 문자열(YYYYMMDD)을, 아니면 None을 반환합니다.
+    자정 직전에 쓰기 시작하여 자정 이후에 완료된 파일(수정 시간은 전날)을 놓치지 않기 위해 사용합니다.
+    """
+    target_date = datetime.strptime(target_date_str, "%Y%m%d").date()
+    if time.time() - get_day_bounds(target_date)[0] >= overlap_sec:
+        return None
+    return (target_date - timedelta(days=1)).strftime("%Y%m%d")
+
+def retire_date_state(watch_folder, target_date_str):
+    """처리 대상이 아닌 지난 날짜의 메모리 상태를 정리합니다.
+
+    처리 대상 날짜 이전 수정 시간의 안정성 확인 대기 파일(`pending_files`)과 재시도 대기 파일(`failed_files`)을 제거하고,
+    말단 폴더 나열 결과 캐시(`dir_scan_cache`)에서 처리 대상 연월이 아닌 폴더를 제거하고,
+    `evict_ledger_states` 함수로 지난 날짜의 처리된 파일 목록, 격리 파일 목록, 텍스트 저널을 정리합니다
+    (지난 날짜의 `output_checked_dates` 항목도 함께 제거).
+    장시간 실행해도 날짜가 바뀔 때마다 메모리 사용량이 늘지 않도록 이전 날짜의 겹침 시간이 끝나면 호출합니다.
+    """
+    global pending_files, failed_files, dir_scan_cache_dirty
+    target_date = datetime.strptime(target_date_str, "%Y%m%d").date()
+    day_start = get_day_bounds(target_date)[0]
+    pending_files = {file_path: pending for file_path, pending in pending_files.items() if pending[1] >= day_start}
+    failed_files = {file_path: failure for file_path, failure in failed_files.items() if failure[0] >= day_start}
+
+    target_leaf_folders = {leaf_folder for leaf_folder, _ in get_target_leaf_folders(watch_folder, target_date)}
+    for leaf_folder in [leaf_folder for leaf_folder in dir_scan_cache if leaf_folder not in target_leaf_folders]:
+        del dir_scan_cache[leaf_folder]
+        dir_scan_cache_dirty = True
+    evict_ledger_states(target_date_str)
+    output_checked_dates.difference_update([key for key in output_checked_dates if key[1] < target_date_str])
+
+def backfill_date_task(config, base_name, target_date_str):
+    """백필 모드에서 한 날짜의 남은 PNG 파일을 모두 변환하고 결과 요약을 반환합니다 (날짜 작업자에서 실행되는 단위 작업).
+
+    `find_and_process_png_files` 함수를 호출하며, [Scan] stability_mode가 'scan'이면 안정성 확인 대기 파일이 없어질 때까지
+    [Scan] min_interval_sec 간격으로 최대 [Scan] stable_scan_count회 스캔합니다.
+    범위에 오늘 날짜가 있으면 아직 쓰는 중인 파일도 있으므로, 실시간 스캔과 같은 간격으로 안정성을 확인합니다.
+    같은 작업자가 다음 날짜를 처리할 때 섞이지 않도록, 끝나면 처리 이력을 닫고 대기/실패 목록을 비웁니다.
+    (날짜, 발견 파일 수, 변환 파일 수, 미처리 파일 수, 소요 시간) 딕셔너리를 반환합니다.
+    """
+    start_time = time.time()
+    base_folder_name = base_name.lower()
+    open_ledger(config, config['Paths']['output_base_folder'], base_folder_name, target_date_str)
+    processed_before = len(processed_files)
+
+    scan_count = config.getint('Scan', 'stable_scan_count', fallback=DEFAULT_STABLE_SCAN_COUNT)
+    min_interval = config.getfloat('Scan', 'min_interval_sec', fallback=SCAN_INTERVAL)
+    found_count = 0
+    for scan_index in range(max(scan_count, 1)):
+        if scan_index > 0:
+            time.sleep(min_interval)
+        found = find_and_process_png_files(config, base_name, target_date_str)
+        if scan_index == 0:
+            found_count = found
+        if not pending_files:
+            break
+
+    summary = {
+        "date": target_date_str,
+        "found": found_count,
+        "converted": len(processed_files) - processed_before,
+        "remaining": len(pending_files) + len(failed_files) + len(quarantined_files),
+        "duration": time.time() - start_time,
+    }
+    close_ledger()
+    pending_files.clear()
+    failed_files.clear()
+    return summary
+
+def get_backfill_dates(from_date_str, to_date_str):
+    """시작 날짜부터 끝 날짜까지(포함) 날짜 문자열(YYYYMMDD) 목록을 반환합니다."""
+    from_date = datetime.strptime(from_date_str, "%Y%m%d").date()
+    to_date = datetime.strptime(to_date_str, "%Y%m%d").date()
+    return [(from_date + timedelta(days=offset)).strftime("%Y%m%d") for offset in range((to_date - from_date).days + 1)]
 
-    print(f"[{base_folder_name}] 폴더 스캔 시작: {watch_folder} (날짜: {target_date_str})")
-    for root, _, files in os.walk(watch_folder):
-        for filename in files:
+def run_backfill(config, base_name, date_strs, num_workers):
+    """백필 모드: 여러 날짜의 남은 PNG 파일을 변환한 후 진행 상황과 처리량 요약을 출력합니다.
+
+    날짜 작업자가 2개 이상이고 날짜가 여러 개이면 `ProcessPoolExecutor`로 날짜별 `backfill_date_task`를 나누어 실행합니다.
+    처리된 파일 목록 등 전역 상태가 날짜마다 다르므로 날짜 단위로 프로세스를 나누며,
+    날짜 작업자 안에서는 변환 작업자 풀을 다시 만들지 않도록 순차 변환합니다.
+    작업자가 1개이면 현재 프로세스에서 날짜 순서대로 처리하며, 이때는 [Processing] convert_mode 설정을 그대로 사용합니다.
+    날짜 하나의 처리 중 오류가 발생하면 로깅하고 나머지 날짜를 계속 처리합니다.
+    """
+    start_time = time.time()
+    summaries = []
+
+    def report_progress(summary):
+        summaries.append(summary)
+        print(f"[{base_name}] 백필 진행 {len(summaries)}/{len(date_strs)}: {summary['date']} - "
+              f"발견 {summary['found']}개, 변환 {summary['converted']}개, 미처리 {summary['remaining']}개, "
+              f"{summary['duration']:.1f}초")
+
+    if num_workers <= 1 or len(date_strs) <= 1:
+        for target_date_str in date_strs:
+            report_progress(backfill_date_task(config, base_name, target_date_str))
+        shutdown_list_executor()
+        shutdown_prefetch_executor()
+        shutdown_convert_executor()
+        shutdown_write_behind()
+    else:
+        if not config.has_section('Processing'):
+            config.add_section('Processing')
+        config.set('Processing', 'convert_mode', "serial")
+        num_workers = min(num_workers, len(date_strs))
+        print(f"[{base_name}] 백필 시작: {date_strs[0]} ~ {date_strs[-1]} ({len(date_strs)}일, 날짜 작업자 {num_workers}개)")
+        with ProcessPoolExecutor(max_workers=num_workers, initializer=init_convert_worker,
+                                 initargs=(config['Paths']['log_folder'], base_name, GLOBAL_GRAYSCALE_MODE)) as executor:
+            futures = {executor.submit(backfill_date_task, config, base_name, target_date_str): target_date_str
+                       for target_date_str in date_strs}
+            for future in as_completed(futures):
+                try:
+                    report_progress(future.result())
+                except Exception as e:
+                    logging.error(f"백필 날짜 처리 중 오류 발생: {futures[future]} - {e}")
+                    print(f"[{base_name}] 백필 실패: {futures[future]} - {e}")
+
+    elapsed = time.time() - start_time
+    converted_total = sum(summary['converted'] for summary in summaries)
+    remaining_total = sum(summary['remaining'] for summary in summaries)
+    print(f"[{base_name}] 백필 완료: {len(summaries)}/{len(date_strs)}일, 변환 {converted_total}개, "
+          f"미처리 {remaining_total}개, {elapsed:.1f}초 ({converted_total / elapsed if elapsed > 0 else 0:.1f}개/초)")
+    return summaries
+
+def run_encoder_benchmark(config, base_name, sample_count):
+    """설치된 JPEG 인코더마다 샘플 PNG의 인코딩 속도와 크기를 측정하여 출력합니다 (--benchmark-encoders).
+
+    설정 파일의 Base 폴더에서 PNG 파일을 최대 `sample_count`개 찾아 한 번만 디코딩한 후,
+    `get_available_encoders` 함수의 인코더마다 같은 이미지들을 [Image] jpg_quality로 인코딩하여
+    이미지당 인코딩 시간(ms)과 크기(bytes), pillow 대비 크기 비율을 출력합니다 (PC마다 [Image] encoder 선택용).
+    파일을 쓰지 않으므로 출력 폴더와 처리 이력에는 영향이 없습니다.
+    """
+    base_folders = dict(config.items('BaseFolders'))
+    if base_name not in base_folders:
+        print(f"오류: Base 폴더 이름 '{base_name}'이(가) config.ini [BaseFolders]에 없습니다.")
+        return
+    quality = int(config['Image']['jpg_quality'])
+
+    images = []
+    for folder, _, filenames in os.walk(base_folders[base_name]):
+        for filename in filenames:
+            if len(images) >= sample_count:
+                break
             if filename.lower().endswith(".png"):
-                png_path = os.path.join(root, filename)
-                relative_path = os.path.relpath(png_path, watch_folder)
-                path_parts = relative_path.split(os.sep)
+                png_path = os.path.join(folder, filename)
+                try:
+                    with Image.open(png_path) as img:
+                        img.load()
+                        images.append(prepare_jpeg_image(img, png_path))
+                except Exception as e:
+                    logging.error(f"벤치마크 샘플 PNG 읽기 중 오류 발생: {png_path} - {e}")
+        if len(images) >= sample_count:
+            break
+    if not images:
+        print(f"[{base_name}] 벤치마크할 PNG 파일이 없습니다: {base_folders[base_name]}")
+        return
 
-                if len(path_parts) == 4 and \
-                   path_parts[0] in ['NG', 'OK', 'NG_OK'] and \
-                   path_parts[1] == target_date.strftime("%Y%m") and \
-                   path_parts[2] in ['LEFT', 'LINE', 'LINE_TAP', 'LOAD', 'LOAD_TAP', 'RIGHT', 'TOP']:
+    print(f"[{base_name}] JPEG 인코더 벤치마크: 샘플 {len(images)}개, 품질 {quality}")
+    print(f"{'인코더':<12}{'ms/이미지':>12}{'bytes/이미지':>16}{'크기(pillow 대비)':>20}")
+    pillow_bytes = None
+    for encoder in get_available_encoders():
+        encode = JPEG_ENCODERS[encoder][0]
+        try:
+            encode(images[0], quality)  # 라이브러리 초기화 시간 제외
+            start_time = time.perf_counter()
+            total_bytes = sum(len(encode(img, quality)) for img in images)
+            elapsed = time.perf_counter() - start_time
+        except Exception as e:
+            print(f"{encoder:<12} 오류: {e}")
+            continue
+        if encoder == DEFAULT_JPEG_ENCODER:
+            pillow_bytes = total_bytes
+        ratio = f"{total_bytes / pillow_bytes * 100:.1f}%" if pillow_bytes else "-"
+        print(f"{encoder:<12}{elapsed / len(images) * 1000:>12.2f}{total_bytes // len(images):>16}{ratio:>20}")
 
-                    try:
-                        modified_timestamp = os.path.getmtime(png_path)
-                        modified_datetime = datetime.fromtimestamp(modified_timestamp)
-                        modified_date = modified_datetime.date()
-
-                        if modified_date == target_date:
-                            if png_path not in processed_files or processed_files[png_path] != modified_timestamp:
-                                print(f"[{base_folder_name}] 새로운 또는 수정된 PNG 발견 (날짜 일치): {png_path}")
-                                if is_file_stable(png_path):
-                                    convert_png_to_jpg(png_path, output_base_folder, base_folder, jpg_quality)
-                                    save_processed_files_to_file(output_base_folder, base_folder_name, target_date_str)
-                                else:
-                                    print(f"[{base_folder_name}] PNG 파일이 아직 안정되지 않음: {png_path}")
-                        elif modified_date > target_date:
-                            # 과거 날짜 처리 후 현재 이후 날짜의 파일은 무시 (최적화)
-                            continue
-
-                    except Exception as e:
-                        logging.error(f"파일 정보 가져오기 오류: {png_path} - {e}")
+def get_next_scan_interval(current_interval, is_active, min_interval, max_interval, backoff_factor):
+    """다음 스캔까지 기다릴 시간을 정합니다.
+
+    새로운 파일 또는 크기/수정 시간이 바뀐 파일이 발견되었으면(`is_active`) 바로 최소 간격으로 돌아가고,
+    아무것도 없으면 `backoff_factor`배씩 늘려 `max_interval`까지 늘립니다.
+    야간처럼 새 파일이 없는 시간에는 스캔 I/O를 줄이고, 새 파일이 들어오면 바로 빠르게 스캔합니다.
+    """
+    if is_active:
+        return min_interval
+    return min(current_interval * backoff_factor, max_interval)
+
+def update_scan_metrics(scan_interval, scan_duration, found_count):
+    """최근 스캔 지표를 전역 변수 `scan_metrics`에 갱신합니다."""
+    scan_metrics.update({
+        "scan_interval_sec": scan_interval,
+        "scans": scan_metrics.get("scans", 0) + 1,
+        "last_scan_duration_sec": round(scan_duration, 3),
+        "last_scan_found": found_count,
+        "pending_files": len(pending_files),
+        "failed_files": len(failed_files),
+        "quarantined_files": len(quarantined_files),
+        "processed_files": len(processed_files),
+    })
+    for category in TARGET_CATEGORY_FOLDERS:
+        max_depth, count, total_wait = priority_queue_stats.get(category, (0, 0, 0.0))
+        scan_metrics[f"queue_max_depth_{category}"] = max_depth
+        scan_metrics[f"queue_avg_wait_sec_{category}"] = round(total_wait / count, 3) if count else 0
+
+def write_scan_metrics(log_folder, base_folder_name):
+    """최근 스캔 지표를 날짜별 CSV 파일에 한 줄 추가합니다.
+
+    파일은 로그 폴더의 연월 폴더 아래 'base_folder_name_metrics_YYYYMMDD.csv'이며, 파일이 없으면 헤더를 먼저 씁니다.
+    우선순위 큐 통계(판정 결과 폴더별 최대 대기 수, 평균 대기 시간)는 기록 후 다음 기록 간격을 위해 비웁니다.
+    파일 쓰기 중 오류가 발생하면 로깅합니다.
+    """
+    today = datetime.now()
+    log_subfolder = os.path.join(log_folder, today.strftime("%Y%m"))
+    filename = os.path.join(log_subfolder, f"{base_folder_name}_metrics_{today.strftime('%Y%m%d')}.csv")
+    try:
+        os.makedirs(log_subfolder, exist_ok=True)
+        file_exists = os.path.isfile(filename)
+        with open(filename, 'a', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=METRICS_FIELDNAMES, extrasaction='ignore')
+            if not file_exists:
+                writer.writeheader()
+            writer.writerow(dict(scan_metrics, timestamp=today.strftime("%Y-%m-%d %H:%M:%S")))
+        priority_queue_stats.clear()
+    except Exception as e:
+        logging.error(f"스캔 지표 저장 중 오류 발생: {filename} - {e}")
 
 def main():
     """스크립트의 주요 실행 로직을 포함합니다.
 
     명령행 인자를 파싱하여 Base 폴더 이름과 처리할 날짜를 가져옵니다.
     설정 파일을 로드하고, 로깅을 설정합니다.
+    --from/--to 날짜 범위가 주어지면 `run_backfill` 함수로 해당 날짜들의 남은 파일을 변환한 후 종료합니다 (백필 모드).
+    --benchmark-encoders가 주어지면 `run_encoder_benchmark` 함수로 JPEG 인코더별 속도와 크기를 출력한 후 종료합니다.
     무한 루프를 통해 `find_and_process_png_files` 함수를 주기적으로 호출하여
     지정된 Base 폴더의 PNG 파일을 JPG로 변환하는 작업을 수행합니다.
-    폴더 스캔 간격은 `SCAN_INTERVAL` 전역 변수에 의해 결정됩니다.
+    폴더 스캔 간격은 `get_next_scan_interval` 함수로 정하며, 새 파일이 없으면 [Scan] max_interval_sec까지 늘어나고
+    새 파일이나 파일 시스템 이벤트가 들어오면 바로 [Scan] min_interval_sec(기본값 `SCAN_INTERVAL`)로 돌아갑니다.
+    현재 스캔 간격 등 스캔 지표는 [Metrics] report_interval_sec 간격으로 로그 폴더의 CSV 파일에 기록합니다.
+    파일 시스템 이벤트 감지가 시작되면 이벤트가 들어오는 즉시 해당 파일만 확인하고,
+    전체 폴더 스캔은 [Events] reconcile_interval_sec 간격으로 놓친 이벤트를 보정하는 용도로만 수행합니다.
+    [Scan] dir_cache를 사용하면 시작 시 스캔 스냅샷을 로드하고, [Scan] snapshot_interval_sec 간격과 종료 시 저장합니다.
+    오늘 날짜를 처리하는 중 자정이 지나면 처리 대상 날짜와 처리 이력을 새 날짜로 바꾸고,
+    [Rollover] overlap_sec 동안은 늦게 완료된 파일을 위해 이전 날짜도 [Rollover] overlap_scan_interval_sec 간격으로 스캔합니다.
+    겹침 시간이 끝나면 `retire_date_state` 함수로 이전 날짜의 메모리 상태를 정리합니다.
+    [Priority] recent_date_first가 true(기본값)이면 오늘 날짜를 이전 날짜보다 먼저 스캔합니다.
     """
     parser = argparse.ArgumentParser(description="특정 Base 폴더의 PNG 이미지를 JPG로 변환합니다.")
-    parser.add_argument("base_name", help="처리할 Base 폴더 이름 (config.ini에 정의).")
+    parser.add_argument("base_name", nargs="?", default="ABH125c_1",
+                        help="처리할 Base 폴더 이름 (config.ini에 정의). 생략 시 ABH125c_1.")
     parser.add_argument("date", nargs="?", default=datetime.now().strftime("%Y%m%d"),
                         help="처리할 특정 날짜 (YYYYMMDD). 생략 시 오늘 날짜 처리.")
+    parser.add_argument("--from", dest="from_date", help="백필 모드: 처리할 시작 날짜 (YYYYMMDD).")
+    parser.add_argument("--to", dest="to_date", help="백필 모드: 처리할 끝 날짜 (YYYYMMDD). 생략 시 시작 날짜만 처리.")
+    parser.add_argument("--workers", type=int, help="백필 모드: 날짜를 동시에 처리하는 작업자 수. 생략 시 config.ini [Backfill] workers.")
+    parser.add_argument("--benchmark-encoders", action="store_true",
+                        help="설치된 JPEG 인코더별로 Base 폴더의 샘플 PNG 인코딩 속도(ms/이미지)와 크기(bytes/이미지)를 출력하고 종료.")
+    parser.add_argument("--samples", type=int, default=DEFAULT_BENCHMARK_SAMPLES,
+                        help=f"인코더 벤치마크에 사용할 샘플 PNG 수 (기본값: {DEFAULT_BENCHMARK_SAMPLES}).")
 
+    args = parser.parse_args()
+    base_name = args.base_name.lower()
+    target_process_date = args.date
 
-    #args = parser.parse_args()
-    base_name = "ABH125c_1" # For testing purposes, hardcoding the base name
-    base_name = base_name.lower()
-
-    #target_process_date = args.date
-    target_process_date = datetime.now().strftime("%Y%m%d") # For testing purposes, hardcoding today's date
+    follow_today = target_process_date == datetime.now().strftime("%Y%m%d")  # 오늘 날짜 처리 중이면 자정에 다음 날짜로 변경
 
     config = load_config()
     output_base_folder = config['Paths']['output_base_folder']
     log_folder = config['Paths']['log_folder']
     setup_logging(log_folder, base_name)
 
-    while True:
-        find_and_process_png_files(config, base_name, target_process_date)
-        time.sleep(SCAN_INTERVAL)
+    if args.benchmark_encoders:
+        run_encoder_benchmark(config, base_name, args.samples)
+        return
+
+    if args.from_date or args.to_date:
+        if not args.from_date:
+            parser.error("--to는 --from과 함께 사용해야 합니다.")
+        try:
+            backfill_dates = get_backfill_dates(args.from_date, args.to_date or args.from_date)
+        except ValueError:
+            parser.error("유효하지 않은 날짜 형식입니다. YYYYMMDD 형식으로 입력해주세요.")
+        if not backfill_dates:
+            parser.error("--to 날짜가 --from 날짜보다 앞설 수 없습니다.")
+        num_workers = args.workers or config.getint('Backfill', 'workers', fallback=DEFAULT_BACKFILL_WORKERS)
+        if config.getboolean('Priority', 'recent_date_first', fallback=True):
+            backfill_dates.reverse()
+        run_backfill(config, base_name, backfill_dates, num_workers)
+        return
+
+    reconcile_interval = config.getfloat('Events', 'reconcile_interval_sec', fallback=DEFAULT_RECONCILE_INTERVAL_SEC)
+    use_events = start_event_source(config, base_name)
+    last_full_scan_time = 0
+
+    use_snapshot = config.getboolean('Scan', 'dir_cache', fallback=False)
+    snapshot_interval = config.getfloat('Scan', 'snapshot_interval_sec', fallback=DEFAULT_SNAPSHOT_INTERVAL_SEC)
+    last_snapshot_time = time.time()
+    if use_snapshot:
+        load_scan_snapshot(output_base_folder, base_name)
+
+    min_interval = config.getfloat('Scan', 'min_interval_sec', fallback=SCAN_INTERVAL)
+    max_interval = config.getfloat('Scan', 'max_interval_sec', fallback=DEFAULT_MAX_SCAN_INTERVAL_SEC)
+    backoff_factor = config.getfloat('Scan', 'backoff_factor', fallback=DEFAULT_SCAN_BACKOFF_FACTOR)
+    metrics_interval = config.getfloat('Metrics', 'report_interval_sec', fallback=DEFAULT_METRICS_INTERVAL_SEC)
+    scan_interval = min_interval
+    last_metrics_time = time.time()
+
+    watch_folder = dict(config.items('BaseFolders')).get(base_name)
+    overlap_sec = config.getfloat('Rollover', 'overlap_sec', fallback=DEFAULT_ROLLOVER_OVERLAP_SEC)
+    overlap_scan_interval = config.getfloat('Rollover', 'overlap_scan_interval_sec',
+                                            fallback=DEFAULT_OVERLAP_SCAN_INTERVAL_SEC)
+    previous_process_date = get_overlap_process_date(target_process_date, overlap_sec) if follow_today else None
+    recent_date_first = config.getboolean('Priority', 'recent_date_first', fallback=True)
+    last_overlap_scan_time = 0
+
+    try:
+        while True:
+            scan_start_time = time.time()
+            found_count = 0
+            if follow_today:
+                today = datetime.now().strftime("%Y%m%d")
+                if today != target_process_date:
+                    print(f"[{base_name}] 처리 날짜 변경: {target_process_date} -> {today} "
+                          f"(이전 날짜는 {overlap_sec:g}초 동안 함께 스캔)")
+                    previous_process_date, target_process_date = target_process_date, today
+                    last_overlap_scan_time = 0
+            overlap_due = previous_process_date is not None and \
+                time.time() - last_overlap_scan_time >= overlap_scan_interval
+            if overlap_due and not recent_date_first:
+                found_count += find_and_process_png_files(config, base_name, previous_process_date)
+
+            if not use_events or time.time() - last_full_scan_time >= reconcile_interval:
+                drain_event_paths()
+                found_count += find_and_process_png_files(config, base_name, target_process_date)
+                last_full_scan_time = time.time()
+            else:
+                png_paths = drain_event_paths()
+                if png_paths or pending_files:
+                    found_count += find_and_process_png_files(config, base_name, target_process_date, png_paths)
+
+            if overlap_due:
+                if recent_date_first:
+                    found_count += find_and_process_png_files(config, base_name, previous_process_date)
+                last_overlap_scan_time = time.time()
+                if get_overlap_process_date(target_process_date, overlap_sec) is None:
+                    print(f"[{base_name}] 이전 날짜 스캔 종료: {previous_process_date}")
+                    previous_process_date = None
+                    if watch_folder is not None:
+                        retire_date_state(watch_folder, target_process_date)
+
+            scan_interval = get_next_scan_interval(scan_interval, found_count > 0,
+                                                   min_interval, max_interval, backoff_factor)
+            update_scan_metrics(scan_interval, time.time() - scan_start_time, found_count)
+            if time.time() - last_metrics_time >= metrics_interval:
+                write_scan_metrics(log_folder, base_name)
+                last_metrics_time = time.time()
+
+            if use_snapshot and time.time() - last_snapshot_time >= snapshot_interval:
+                save_scan_snapshot(output_base_folder, base_name)
+                last_snapshot_time = time.time()
+
+            if use_events:
+                if event_signal.wait(scan_interval):
+                    scan_interval = min_interval
+            else:
+                time.sleep(scan_interval)
+    finally:
+        stop_event_source()
+        shutdown_list_executor()
+        shutdown_prefetch_executor()
+        shutdown_convert_executor()
+        shutdown_write_behind()
+        close_ledger()
+        if use_snapshot:
+            save_scan_snapshot(output_base_folder, base_name)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,265 @@
+import os
+import sys
+import configparser
+from datetime import datetime
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import png2jpg_Convert_v013 as conv  # noqa: E402
+
+BASE_NAME = "abh125c_1"
+TODAY = "20261017"
+YESTERDAY = "20261016"
+
+
+def reset_module_state():
+    # 테스트마다 모듈 전역 상태(처리 이력, 대기/실패 목록, 캐시, 작업자 풀)를 초기화합니다.
+    conv.shutdown_list_executor()
+    conv.shutdown_prefetch_executor()
+    conv.shutdown_convert_executor()
+    conv.shutdown_write_behind()
+    conv.close_ledger()
+    conv.processed_files = {}
+    conv.quarantined_files = {}
+    conv.processed_journal_line_count = 0
+    conv.pending_files.clear()
+    conv.failed_files.clear()
+    conv.dir_scan_cache.clear()
+    conv.created_output_folders.clear()
+    conv.output_checked_dates.clear()
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    reset_module_state()
+    yield
+    reset_module_state()
+
+
+def make_config(tmp_path, **sections):
+    # tmp_path 아래에 감시/출력/로그 폴더를 두는 메모리 내 설정을 만듭니다 (sections로 항목 추가/변경).
+    config = configparser.ConfigParser()
+    config.read_dict({
+        'Paths': {'output_base_folder': str(tmp_path / "out"), 'log_folder': str(tmp_path / "log")},
+        'Image': {'jpg_quality': '80'},
+        'BaseFolders': {BASE_NAME: str(tmp_path / "src")},
+        'Scan': {'min_interval_sec': '0'},
+    })
+    for section, values in sections.items():
+        if not config.has_section(section):
+            config.add_section(section)
+        for key, value in values.items():
+            config[section][key] = str(value)
+    return config
+
+
+def create_png(tmp_path, filename, date_str=TODAY, category="NG", camera="LEFT"):
+    # 규칙에 맞는 말단 폴더에 PNG를 만들고, 수정 시간을 처리 대상 날짜의 정오로 맞춥니다.
+    folder = tmp_path / "src" / category / date_str[:6] / camera
+    folder.mkdir(parents=True, exist_ok=True)
+    png_path = str(folder / filename)
+    Image.new('RGB', (16, 16), color='white').save(png_path)
+    noon = datetime.strptime(date_str, "%Y%m%d").replace(hour=12).timestamp()
+    os.utime(png_path, (noon, noon))
+    return png_path
+
+
+def count_calls(monkeypatch, name):
+    # 모듈 함수 호출 횟수를 세도록 감쌉니다.
+    calls = []
+    original = getattr(conv, name)
+
+    def wrapper(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+    monkeypatch.setattr(conv, name, wrapper)
+    return calls
+
+
+def test_open_ledger_parks_and_restores_dates_without_reload(tmp_path, monkeypatch):
+    # 겹침 시간처럼 두 날짜를 번갈아 열어도 저널 재생과 격리 목록 로드는 날짜별로 한 번만 일어나야 합니다.
+    config = make_config(tmp_path)
+    output_base_folder = str(tmp_path / "out")
+    journal_loads = count_calls(monkeypatch, 'load_processed_files_from_file')
+    quarantine_loads = count_calls(monkeypatch, 'load_quarantine_files')
+
+    for index in range(3):
+        for date_str in (YESTERDAY, TODAY):
+            assert conv.open_ledger(config, output_base_folder, BASE_NAME, date_str)
+            conv.record_processed_file(f"/{date_str}_{index}.png", float(index))
+            conv.commit_ledger()
+
+    assert len(journal_loads) == 2
+    assert len(quarantine_loads) == 2
+    assert conv.ledger_key == (BASE_NAME, TODAY)
+    assert sorted(conv.processed_files) == [f"/{TODAY}_{index}.png" for index in range(3)]
+
+    conv.open_ledger(config, output_base_folder, BASE_NAME, YESTERDAY)
+    assert sorted(conv.processed_files) == [f"/{YESTERDAY}_{index}.png" for index in range(3)]
+
+
+def test_evict_ledger_states_drops_previous_date_and_keeps_journal(tmp_path):
+    # 이전 날짜가 현재 열려 있어도 정리되어야 하며, 정리 후 오늘 날짜는 보관된 상태로, 이전 날짜는 저널에서 다시 로드됩니다.
+    config = make_config(tmp_path)
+    output_base_folder = str(tmp_path / "out")
+    conv.open_ledger(config, output_base_folder, BASE_NAME, TODAY)
+    conv.record_processed_file("/today.png", 1.0)
+    conv.open_ledger(config, output_base_folder, BASE_NAME, YESTERDAY)
+    conv.record_processed_file("/yesterday.png", 2.0)
+    conv.commit_ledger()
+
+    conv.evict_ledger_states(TODAY)
+    assert conv.ledger_key is None
+    assert conv.processed_files == {}
+    assert list(conv.ledger_states) == [(BASE_NAME, TODAY)]
+
+    conv.open_ledger(config, output_base_folder, BASE_NAME, TODAY)
+    assert conv.processed_files == {"/today.png": 1.0}
+    conv.close_ledger()
+    assert conv.ledger_states == {}
+
+    conv.open_ledger(config, output_base_folder, BASE_NAME, YESTERDAY)
+    assert conv.processed_files == {"/yesterday.png": 2.0}
+
+
+def test_sqlite_ledger_switches_dates_and_persists_rows(tmp_path):
+    # SQLite 처리 이력도 날짜를 바꿨다가 돌아올 때 보관된 목록을 사용하고, 닫은 후 다시 열면 DB에서 같은 내용을 읽어야 합니다.
+    config = make_config(tmp_path, Ledger={'backend': 'sqlite', 'sqlite_path': str(tmp_path / "ledger" / "ledger.sqlite3")})
+    output_base_folder = str(tmp_path / "out")
+    for date_str in (TODAY, YESTERDAY, TODAY):
+        assert conv.open_ledger(config, output_base_folder, BASE_NAME, date_str)
+        conv.record_processed_file(f"/{date_str}.png", 1.0)
+        conv.commit_ledger()
+    conv.close_ledger()
+
+    conv.open_ledger(config, output_base_folder, BASE_NAME, YESTERDAY)
+    assert conv.processed_files == {f"/{YESTERDAY}.png": 1.0}
+    conv.open_ledger(config, output_base_folder, BASE_NAME, TODAY)
+    assert conv.processed_files == {f"/{TODAY}.png": 1.0}
+
+
+def test_journal_replay_keeps_latest_entry(tmp_path):
+    # 같은 파일이 저널에 여러 번 기록되어 있으면 마지막 기록을 사용하고, 형식이 맞지 않는 줄은 무시해야 합니다.
+    output_base_folder = str(tmp_path / "out")
+    journal_path = conv.get_processed_files_path(output_base_folder, BASE_NAME, TODAY)
+    os.makedirs(os.path.dirname(journal_path))
+    with open(journal_path, 'w', encoding='utf-8') as f:
+        f.write("/a.png\t1.0\n/b.png\t2.0\n/a.png\t3.0\nbroken line\n")
+
+    line_count = conv.load_processed_files_from_file(output_base_folder, BASE_NAME, TODAY)
+    assert line_count == 4
+    assert conv.processed_files == {"/a.png": 3.0, "/b.png": 2.0}
+
+
+def test_journal_compaction_rewrites_only_current_entries(tmp_path, monkeypatch):
+    # 저널 줄 수가 처리된 파일 수보다 기준 이상 많아지면 현재 목록만 남도록 압축하고, 압축 후에도 추가 기록이 이어져야 합니다.
+    monkeypatch.setattr(conv, 'JOURNAL_COMPACT_THRESHOLD', 5)
+    config = make_config(tmp_path)
+    output_base_folder = str(tmp_path / "out")
+    conv.open_ledger(config, output_base_folder, BASE_NAME, TODAY)
+    for modified_time in range(10):
+        conv.record_processed_file("/a.png", float(modified_time))
+    conv.commit_ledger()
+    conv.record_processed_file("/b.png", 1.0)
+    conv.close_ledger()
+
+    journal_path = conv.get_processed_files_path(output_base_folder, BASE_NAME, TODAY)
+    with open(journal_path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert lines == ["/a.png\t9.0", "/b.png\t1.0"]
+    assert conv.load_processed_files_from_file(output_base_folder, BASE_NAME, TODAY) == 2
+
+
+def test_backfill_rerun_skips_already_converted_outputs(tmp_path, monkeypatch):
+    # 처리 이력을 잃은 후 다시 백필하면, 첫 스캔에서 안정성 확인 전이라도 이미 변환된 JPG가 있는 파일은 다시 변환하지 않아야 합니다.
+    config = make_config(tmp_path, Scan={'stable_scan_count': 2}, Processing={'skip_identical_output': 'true'})
+    output_base_folder = str(tmp_path / "out")
+    png_paths = [create_png(tmp_path, f"{index}.png", YESTERDAY) for index in range(3)]
+    conv.run_backfill(config, BASE_NAME, [YESTERDAY], 1)
+    for png_path in png_paths:
+        assert os.path.exists(conv.get_jpg_output_path(png_path, output_base_folder, str(tmp_path / "src")))
+
+    # 재시작: 메모리 상태와 처리 이력을 모두 잃은 상태
+    reset_module_state()
+    os.remove(conv.get_processed_files_path(output_base_folder, BASE_NAME, YESTERDAY))
+    converts = count_calls(monkeypatch, 'convert_png_to_jpg')
+    conv.run_backfill(config, BASE_NAME, [YESTERDAY], 1)
+
+    assert converts == []
+    conv.open_ledger(config, output_base_folder, BASE_NAME, YESTERDAY)
+    assert sorted(conv.processed_files) == sorted(png_paths)
+
+
+def test_unchanged_pending_file_does_not_count_as_found(tmp_path):
+    # 크기 0으로 남은 PNG는 처음 발견할 때만 세고, 대기 중 크기가 바뀌면 다시 세야 합니다 (스캔 간격이 최소로 고정되지 않도록).
+    config = make_config(tmp_path)
+    png_path = create_png(tmp_path, "empty.png")
+    noon = os.path.getmtime(png_path)
+    open(png_path, 'wb').close()
+    os.utime(png_path, (noon, noon))
+
+    assert conv.find_and_process_png_files(config, BASE_NAME, TODAY) == 1
+    assert conv.find_and_process_png_files(config, BASE_NAME, TODAY) == 0
+    assert conv.find_and_process_png_files(config, BASE_NAME, TODAY, [png_path]) == 0
+    assert png_path in conv.pending_files
+
+    with open(png_path, 'wb') as f:
+        f.write(b"\x89PNG")
+    os.utime(png_path, (noon, noon))
+    assert conv.find_and_process_png_files(config, BASE_NAME, TODAY) == 1
+
+
+def test_is_local_folder_detects_network_mounts(tmp_path, monkeypatch):
+    # UNC 경로와 CIFS/NFS로 마운트된 폴더는 로컬 폴더가 아니며, 가장 긴 마운트 지점 기준으로 판단해야 합니다.
+    mounts_file = tmp_path / "mounts"
+    mounts_file.write_text("/dev/sda1 / ext4 rw 0 0\n"
+                           "//server/share /mnt/share cifs rw 0 0\n"
+                           "/dev/sdb1 /mnt/share/local ext4 rw 0 0\n"
+                           "server:/export /mnt/nfs\\040data nfs4 rw 0 0\n", encoding='utf-8')
+    monkeypatch.setattr(conv, 'PROC_MOUNTS_FILE', str(mounts_file))
+    monkeypatch.setattr(conv.os, 'name', 'posix')
+
+    assert not conv.is_local_folder("\\\\server\\share\\abh125c_1")
+    assert not conv.is_local_folder("//server/share/abh125c_1")
+    assert not conv.is_local_folder("/mnt/share/abh125c_1")
+    assert not conv.is_local_folder("/mnt/nfs data/abh125c_1")
+    assert conv.is_local_folder("/mnt/share/local/abh125c_1")
+    assert conv.is_local_folder("/mnt/shared")
+
+    monkeypatch.setattr(conv, 'PROC_MOUNTS_FILE', str(tmp_path / "missing"))
+    assert conv.is_local_folder("/mnt/share/abh125c_1")
+
+
+def test_sqlite_ledger_refuses_network_folder(tmp_path):
+    # SQLite DB 경로가 네트워크 폴더이면 DB를 만들지 않고 처리 이력을 열지 않아야 하며, 경로를 비워 두면 기본 로컬 경로를 사용합니다.
+    config = make_config(tmp_path, Ledger={'backend': 'sqlite', 'sqlite_path': "//server/share/processed_files.sqlite3"})
+    assert not conv.open_ledger(config, str(tmp_path / "out"), BASE_NAME, TODAY)
+    assert conv.ledger_key is None
+    assert conv.sqlite_ledger_connection is None
+    assert conv.processed_files == {}
+
+    config['Ledger']['sqlite_path'] = ""
+    assert conv.get_sqlite_ledger_path(config) == conv.DEFAULT_SQLITE_LEDGER_PATH
+
+
+def test_dir_cache_hit_skips_deferred_files(tmp_path, monkeypatch):
+    # 바뀌지 않은 말단 폴더에서는 격리된 파일과 재시도 시각이 되지 않은 파일을 다시 stat하지 않고, 재시도 시각이 된 파일만 확인해야 합니다.
+    paths = {name: create_png(tmp_path, f"{name}.png") for name in ("quarantined", "waiting", "due", "processed")}
+    leaf_folder = os.path.dirname(paths["due"])
+    day_start = datetime.strptime(TODAY, "%Y%m%d").timestamp()
+    day_bounds = (day_start, day_start + 24 * 60 * 60)
+    assert len(conv.scan_leaf_folder(leaf_folder, "NG", day_bounds, True, 3600)) == 4
+
+    mtime = os.path.getmtime(paths["due"])
+    now = conv.time.time()
+    conv.quarantined_files = {paths["quarantined"]: mtime}
+    conv.failed_files[paths["waiting"]] = (mtime, 1, now + 3600, 1)
+    conv.failed_files[paths["due"]] = (mtime, 1, now - 1, 1)
+    conv.processed_files = {paths["processed"]: mtime}
+    stats = count_calls(monkeypatch, 'stat_png_candidate')
+
+    candidates = conv.scan_leaf_folder(leaf_folder, "NG", day_bounds, True, 3600)
+    assert [candidate.path for candidate in candidates] == [paths["due"]]
+    assert [args[0] for args in stats] == [paths["due"]]